@@ -1,100 +1,317 @@
 
 from collections import deque
-from tabulate import tabulate
-
-def arc(board : list):
-    domains = [[set(range(1, 10)) for _ in range(9)] for _ in range(9)]
-    assigned  = 0 
-    arced = set()
-    queue = deque()
-    steps = []
-    for i in range(9):
-        for j in range(9):
-            if board[i][j] != 0:
-                domains[i][j] = set([board[i][j]])
-                queue.append((i, j))
-                assigned += 1
-    while queue:
-        i, j = queue.popleft()
-        arced.add((i, j))
-        value = board[i][j]
-        ## row reduction
-        for k in range(9):
-            if k != j and (value in domains[i][k]):
-                domains[i][k].discard(value)
-                step = {
-                    "from":(i,k),
-                    "to":(i,j),
-                    "value":value
-                }
-                steps.append(step)  
-                if len(domains[i][k]) == 1 and (i, k) not in arced:
-                    queue.append((i, k))
-                    inferred_value = list(domains[i][k])[0]
-                    board[i][k] = inferred_value
-                    assigned += 1
-                    inferred_step = {
-                        "type": "arc_inferred",
-                        "cell": (i, k),
-                        "value": inferred_value
-                    }
-                    steps.append(inferred_step)
-                if len(domains[i][k]) == 0:
-                    return board, domains,steps, False ,True 
-                
-        ## col reduction
-        for k in range(9):
-            if k != i and value in domains[k][j]:
-                domains[k][j].discard(value)
-                step = {
-                    "from":(k,j),
-                    "to":(i,j),
-                    "value":value
-                }
-                steps.append(step)   
-                if len(domains[k][j]) == 1 and (k, j) not in arced:
-                    queue.append((k, j))
-                    inferred_value = list(domains[k][j])[0]
-                    board[k][j] = inferred_value
-                    assigned += 1
-                    inferred_step = {
-                        "type": "arc_inferred",
-                        "cell": (k, j),
-                        "value": inferred_value
-                    }
-                    steps.append(inferred_step)
-                if len(domains[k][j]) == 0:
-                    return board, domains, steps, False,True
-                
-        ## square reduction
-        start_row = i - i % 3
-        start_col = j - j % 3
-        for k in range(start_row, start_row + 3):
-            for l in range(start_col, start_col + 3):
-                if ( k != i or l != j) and value in domains[k][l]:
-                    domains[k][l].discard(value)
-                    step = {
-                        "from":(k,l),
-                        "to":(i,j),
-                        "value":value
-                    }
-                    steps.append(step)   
-                    if len(domains[k][l]) == 1 and (k, l) not in arced:
-                        queue.append((k, l))
-                        inferred_value = list(domains[k][l])[0]
-                        board[k][l] = inferred_value
-                        assigned += 1
-                        inferred_step = {
-                            "type": "arc_inferred",
-                            "cell": (k, l),
-                            "value": inferred_value
-                        }
-                        steps.append(inferred_step)
-                    if len(domains[k][l]) == 0:
-                        return board, domains, steps, False,False
+from itertools import combinations
 
-    
-    return board, domains, steps, True, assigned == 81
+from board_state import FULL, MASK_DIGITS, MASK_SIZE, PEERS, UNITS, ROW_CELLS, COL_CELLS, BOX_CELLS, ROW_OF, COL_OF, BOX_OF
+from solver_trace import VerboseTrace
+
+
+class ArcState:
+    """Domains of all 81 cells as 9-bit masks, with a trail for in-place undo.
+
+    Every domain change pushes (cell, old_domain, old_value) onto the trail,
+    so backtracking restores the state by popping back to a mark instead of
+    copying the board or the domains.
+    """
+
+    def __init__(self, board, trace, rules=(), level="full"):
+        self.values = [0] * 81
+        self.domains = [FULL] * 81
+        self.trail = []
+        # Inferences go to trace, domain removals to removals; either may be
+        # None so the hot loops skip recording entirely (see TRACE_LEVELS).
+        self.trace = trace if level != "none" else None
+        self.removals = trace if level == "full" else None
+        self.rules = [RULES[name] for name in rules]
+        for i in range(9):
+            for j in range(9):
+                if board[i][j] != 0:
+                    idx = i * 9 + j
+                    self.values[idx] = board[i][j]
+                    self.domains[idx] = 1 << (board[i][j] - 1)
+
+    def assigned_cells(self):
+        return [idx for idx in range(81) if self.values[idx] != 0]
+
+    def mark(self):
+        return len(self.trail)
+
+    def undo(self, mark):
+        trail, domains, values = self.trail, self.domains, self.values
+        while len(trail) > mark:
+            idx, domain, value = trail.pop()
+            domains[idx] = domain
+            values[idx] = value
+
+    def assign(self, idx, num):
+        """Assign num to an unassigned cell; False if num is not in its domain."""
+        bit = 1 << (num - 1)
+        if not self.domains[idx] & bit:
+            return False
+        self.trail.append((idx, self.domains[idx], 0))
+        self.domains[idx] = bit
+        self.values[idx] = num
+        return True
+
+    def propagate(self, queue):
+        """Run peer elimination, then the enabled rules, until nothing changes.
+
+        Rules are tried in order; as soon as one changes a domain we go back
+        to the cheap peer elimination before trying the rules again.
+        Returns False as soon as a contradiction is found.
+        """
+        queue = deque(queue)
+        while True:
+            if not self._eliminate(queue):
+                return False
+            for rule in self.rules:
+                before = len(self.trail)
+                if not rule(self, queue):
+                    return False
+                if len(self.trail) != before:
+                    break
+            else:
+                return True
+
+    def _eliminate(self, queue):
+        """Remove the value of each queued cell from its peers' domains.
+
+        Peers reduced to a single value are assigned and queued in turn.
+        """
+        domains, values, trail, trace, removals = self.domains, self.values, self.trail, self.trace, self.removals
+        while queue:
+            idx = queue.popleft()
+            value = values[idx]
+            bit = 1 << (value - 1)
+            for peer in PEERS[idx]:
+                domain = domains[peer]
+                if not domain & bit:
+                    continue
+                trail.append((peer, domain, values[peer]))
+                domain ^= bit
+                domains[peer] = domain
+                if removals is not None:
+                    removals.removal(peer, idx, value)
+                if domain == 0:
+                    return False
+                if MASK_SIZE[domain] == 1 and values[peer] == 0:
+                    inferred = MASK_DIGITS[domain][0]
+                    values[peer] = inferred
+                    if trace is not None:
+                        trace.inferred(peer, inferred)
+                    queue.append(peer)
+        return True
+
+    def restrict(self, idx, keep, rule, anchor, queue):
+        """Remove every value outside keep from the domain of idx on behalf of a rule."""
+        domain = self.domains[idx]
+        removed = domain & ~keep
+        if not removed:
+            return True
+        self.trail.append((idx, domain, self.values[idx]))
+        domain &= keep
+        self.domains[idx] = domain
+        if self.removals is not None:
+            for value in MASK_DIGITS[removed]:
+                self.removals.removal(idx, anchor, value, rule)
+        if domain == 0:
+            return False
+        if MASK_SIZE[domain] == 1 and self.values[idx] == 0:
+            inferred = MASK_DIGITS[domain][0]
+            self.values[idx] = inferred
+            if self.trace is not None:
+                self.trace.inferred(idx, inferred, rule)
+            queue.append(idx)
+        return True
+
+    def domain_lists(self):
+        """Domains as a 9x9 grid of digit lists (JSON serializable)."""
+        domains = self.domains
+        return [[list(MASK_DIGITS[domains[i * 9 + j]]) for j in range(9)] for i in range(9)]
+
+    def write_to(self, board):
+        values = self.values
+        for i in range(9):
+            board[i][:] = values[i * 9:i * 9 + 9]
+
+
+## Propagation rules. Each takes the state and the propagation queue, and
+## returns False on a contradiction. Changes go through state.restrict (or the
+## trail directly) so they are undone on backtrack and reported in the steps.
+
+def hidden_single(state, queue):
+    """A digit with only one possible cell left in a unit goes there."""
+    domains, values = state.domains, state.values
+    for unit in UNITS:
+        once = twice = placed = 0
+        for idx in unit:
+            if values[idx]:
+                placed |= 1 << (values[idx] - 1)
+            else:
+                twice |= once & domains[idx]
+                once |= domains[idx]
+        if FULL & ~(once | placed):
+            return False
+        singles = once & ~twice & ~placed
+        if not singles:
+            continue
+        found = []
+        for value in MASK_DIGITS[singles]:
+            bit = 1 << (value - 1)
+            for idx in unit:
+                if not values[idx] and domains[idx] & bit:
+                    found.append((idx, value))
+                    break
+        for idx, value in found:
+            if values[idx]:
+                # Two digits need the same cell
+                return False
+            state.trail.append((idx, domains[idx], 0))
+            domains[idx] = 1 << (value - 1)
+            values[idx] = value
+            if state.trace is not None:
+                state.trace.inferred(idx, value, "hidden_single")
+            queue.append(idx)
+    return True
+
+
+def _naked_subsets(state, queue, size, rule):
+    """size cells of a unit whose domains together hold size digits own them."""
+    domains, values = state.domains, state.values
+    for unit in UNITS:
+        open_cells = [idx for idx in unit if not values[idx]]
+        if len(open_cells) <= size:
+            continue
+        small = [idx for idx in open_cells if MASK_SIZE[domains[idx]] <= size]
+        for subset in combinations(small, size):
+            union = 0
+            for idx in subset:
+                union |= domains[idx]
+            if MASK_SIZE[union] != size:
+                continue
+            for idx in open_cells:
+                if idx not in subset and domains[idx] & union:
+                    if not state.restrict(idx, ~union, rule, subset[0], queue):
+                        return False
+            if queue:
+                return True
+    return True
+
+
+def _hidden_subsets(state, queue, size, rule):
+    """size digits confined to the same size cells of a unit fill those cells."""
+    domains, values = state.domains, state.values
+    for unit in UNITS:
+        open_cells = [idx for idx in unit if not values[idx]]
+        if len(open_cells) <= size:
+            continue
+        # Positions of each open digit as a 9-bit mask over the unit
+        positions = {}
+        for pos, idx in enumerate(unit):
+            if values[idx]:
+                continue
+            for value in MASK_DIGITS[domains[idx]]:
+                positions[value] = positions.get(value, 0) | 1 << pos
+        digits = [value for value, where in positions.items() if MASK_SIZE[where] <= size]
+        for subset in combinations(digits, size):
+            where = 0
+            keep = 0
+            for value in subset:
+                where |= positions[value]
+                keep |= 1 << (value - 1)
+            if MASK_SIZE[where] != size:
+                continue
+            cells = [unit[pos - 1] for pos in MASK_DIGITS[where]]
+            for idx in cells:
+                if not state.restrict(idx, keep, rule, cells[0], queue):
+                    return False
+            if queue:
+                return True
+    return True
+
+
+def naked_pair(state, queue):
+    return _naked_subsets(state, queue, 2, "naked_pair")
+
+
+def naked_triple(state, queue):
+    return _naked_subsets(state, queue, 3, "naked_triple")
+
+
+def hidden_pair(state, queue):
+    return _hidden_subsets(state, queue, 2, "hidden_pair")
+
+
+def hidden_triple(state, queue):
+    return _hidden_subsets(state, queue, 3, "hidden_triple")
+
+
+def _confined(state, inner, outer, rule, queue):
+    """If a digit's cells in unit inner all lie in unit outer, clear it from the rest of outer."""
+    domains, values = state.domains, state.values
+    inner_set = set(inner)
+    outer_set = set(outer)
+    for value in range(1, 10):
+        if queue:
+            # An inferred cell must be propagated before it can be reasoned about
+            return True
+        bit = 1 << (value - 1)
+        cells = [idx for idx in inner if not values[idx] and domains[idx] & bit]
+        if not cells or not outer_set.issuperset(cells):
+            continue
+        for idx in outer:
+            if idx not in inner_set and not values[idx] and domains[idx] & bit:
+                if not state.restrict(idx, ~bit, rule, cells[0], queue):
+                    return False
+    return True
+
+
+def pointing(state, queue):
+    """A digit confined to one row or column of a box is cleared from the rest of that line."""
+    for box in BOX_CELLS:
+        # box[::4] walks the box diagonal, one cell per row and column
+        for idx in box[::4]:
+            if not _confined(state, box, ROW_CELLS[ROW_OF[idx]], "pointing", queue):
+                return False
+            if not _confined(state, box, COL_CELLS[COL_OF[idx]], "pointing", queue):
+                return False
+            if queue:
+                return True
+    return True
+
+
+def box_line(state, queue):
+    """A digit confined to one box within a row or column is cleared from the rest of that box."""
+    for line in ROW_CELLS + COL_CELLS:
+        for idx in line[::3]:
+            if not _confined(state, line, BOX_CELLS[BOX_OF[idx]], "box_line", queue):
+                return False
+            if queue:
+                return True
+    return True
+
+
+RULES = {
+    "hidden_single": hidden_single,
+    "naked_pair": naked_pair,
+    "hidden_pair": hidden_pair,
+    "pointing": pointing,
+    "box_line": box_line,
+    "naked_triple": naked_triple,
+    "hidden_triple": hidden_triple,
+}
+
+
+def arc(board : list, rules=(), level="full", stats=None):
+    steps = VerboseTrace(domain_snapshots=level == "full")
+    state = ArcState(board, steps, rules, level)
+    queue = state.assigned_cells()
+    ok = state.propagate(queue) if stats is None else stats.propagate(state, queue)
+    state.write_to(board)
+    domains = [[set(MASK_DIGITS[state.domains[i * 9 + j]]) for j in range(9)] for i in range(9)]
+    assigned = sum(1 for value in state.values if value != 0)
+
+    return board, domains, steps, ok, ok and assigned == 81
     
     
     ## build queue of ones domain and for arcs for them with col , row, square 
@@ -102,6 +319,7 @@ def arc(board : list):
     ## if found var become one add it to the queue 
 
 
+# from tabulate import tabulate
 # def format_domain(domain_set):
 #     """Format domain set for display"""
 #     if len(domain_set) == 1:
@@ -1,66 +1,365 @@
 import copy
 import random
-
-def solvable(board, i = 0, j = 0):
-    empty = find_empty_location(board, i, j)
-
-    if not empty:
+import time
+
+from arc import ArcState
+from board_state import BoardState, FULL, MASK_DIGITS, MASK_SIZE, PEERS, ROW_OF, COL_OF, BOX_OF
+from stats import BudgetExceeded, SearchStats
+
+# strategy name -> (variable ordering, value ordering, randomized restarts)
+STRATEGIES = {
+    "naive": ("static", "ascending", False),
+    "mrv": ("mrv", "ascending", False),
+    "mrv_degree": ("mrv_degree", "ascending", False),
+    "mrv_lcv": ("mrv", "lcv", False),
+    "mrv_degree_lcv": ("mrv_degree", "lcv", False),
+    "random_restarts": ("mrv_random", "random", True),
+}
+
+# Node limit of the first randomized run; doubled after every restart
+RESTART_NODE_LIMIT = 100
+
+def solvable(board, i = 0, j = 0, stats = None):
+    state = BoardState(board)
+
+    for _ in _solutions(state, state.empty_cells(i * 9 + j), stats):
+        state.write_to(board)
         return True
-    
-    row, col = empty
-
-    for num in get_possible_values(board, row, col):
-        if is_safe(board, row, col, num):
-            board[row][col] = num
-
-            if solvable(board, row, col):
-                return True
-
-            board[row][col] = 0
 
     return False
 
-def get_solution(board, i = 0, j = 0):
-    empty = find_empty_location(board, i, j)
+def get_solution(board, i = 0, j = 0, strategy = "naive", stats = None):
+    if strategy != "naive":
+        solution, nodes = get_solution_with_stats(board, strategy, stats)
+        return solution
+
+    state = BoardState(board)
 
-    if not empty:
+    for _ in _solutions(state, state.empty_cells(i * 9 + j), stats):
+        state.write_to(board)
         return copy.deepcopy(board)
-    
-    row, col = empty
 
-    for num in range(1, 10):
-        if is_safe(board, row, col, num):
-            board[row][col] = num
-            result = get_solution(board, row, col)
-            if result != None:
-                return result
+    return None
 
-            board[row][col] = 0
+def get_solution_with_stats(board, strategy = "naive", stats = None):
+    """Solve with the given ordering strategy; returns (solution or None, nodes).
+
+    If stats (a stats.SearchStats) is given, it accumulates the counters of
+    every run, including restarted ones. Like every search in this module,
+    it raises stats.BudgetExceeded when the budget on stats runs out.
+    """
+    variable, value, restarts = STRATEGIES[strategy]
+    choose, order = _CHOOSERS[variable], _ORDERS[value]
+    run = SearchStats() if stats is None else stats
+    before = run.nodes
+    node_limit = RESTART_NODE_LIMIT if restarts else None
+
+    while True:
+        attempt = run
+        if node_limit is not None:
+            # Each restart gets its own node limit within what is left of the budget
+            time_limit = None if run.deadline is None else run.deadline - time.perf_counter()
+            max_nodes = node_limit if run.max_nodes is None else min(node_limit, run.max_nodes - run.nodes)
+            attempt = SearchStats(time_limit, max_nodes, run.cancel)
+
+        state = BoardState(board)
+        solution = None
+        try:
+            for _ in _solutions(state, state.empty_cells(), attempt, choose=choose, order=order):
+                solution = state.to_board()
+                break
+        except BudgetExceeded as exc:
+            if attempt is run:
+                raise
+            run.add(attempt)
+            if exc.reason != "nodes" or run.max_nodes is not None and run.nodes > run.max_nodes:
+                raise BudgetExceeded(exc.reason, run)
+            node_limit *= 2
+            continue
+
+        if attempt is not run:
+            run.add(attempt)
+        return solution, run.nodes - before
+
+def iter_solutions(board, i = 0, j = 0, stats = None):
+    """Yield every solution of board as a new 9x9 list, lazily.
+
+    Only the search stack and the current solution are held, so memory stays
+    constant however many solutions are consumed. board is not modified.
+    """
+    state = BoardState(board)
+    for _ in _solutions(state, state.empty_cells(i * 9 + j), stats, mrv=True):
+        yield state.to_board()
+
+def get_number_of_solutions(board, i = 0, j = 0, max_solutions=2, stats = None):
+    state = BoardState(board)
+    count = 0
+    for _ in _solutions(state, state.empty_cells(i * 9 + j), stats):
+        count += 1
+        if count >= max_solutions:
+            break
+    return count
 
-    return None
+# Propagation used to reject boards before analyze searches them
+PRECHECK_RULES = ("hidden_single",)
 
-def get_number_of_solutions(board, i = 0, j = 0, max_solutions=2):
-    empty = find_empty_location(board, i, j)
+def analyze(board, max_solutions=2, stats = None):
+    """Solvability, solution count (up to max_solutions) and a first solution in one search.
 
-    if not empty:
-        return 1
-    
-    row, col = empty
-    count = 0
+    Peer elimination and hidden singles run first: a board where some cell
+    ends up with no candidates is rejected without searching, and the cells
+    they fill shrink the search for the rest. board is not modified.
 
-    for num in range(1, 10):
-        if is_safe(board, row, col, num):
-            board[row][col] = num
+    Returns a dict with solvable, number_of_solutions, solution (or None),
+    time_to_first_ms (until solvability was known) and time_taken_ms.
+    """
+    start = time.perf_counter()
+    state = ArcState(board, None, PRECHECK_RULES, "none")
+    queue = state.assigned_cells()
+    ok = state.propagate(queue) if stats is None else stats.propagate(state, queue)
 
-            count += get_number_of_solutions(board, row, col, max_solutions - count)
-            
-            board[row][col] = 0
-            
+    count = 0
+    solution = None
+    time_to_first = None
+    if ok:
+        propagated = [row[:] for row in board]
+        state.write_to(propagated)
+        board_state = BoardState(propagated)
+        for _ in _solutions(board_state, board_state.empty_cells(), stats, mrv=True):
+            if count == 0:
+                solution = board_state.to_board()
+                time_to_first = (time.perf_counter() - start) * 1000
+            count += 1
             if count >= max_solutions:
-                return count
-
+                break
+
+    time_taken = (time.perf_counter() - start) * 1000
+    return {
+        "solvable": count > 0,
+        "number_of_solutions": count,
+        "solution": solution,
+        "time_to_first_ms": time_taken if time_to_first is None else time_to_first,
+        "time_taken_ms": time_taken,
+    }
+
+def count_solutions(state, max_solutions=2, stats = None):
+    """Count solutions of a BoardState (up to max_solutions), leaving it unchanged.
+
+    Branches on the open cell with the fewest candidates, which keeps
+    uniqueness checks on sparse boards cheap.
+    """
+    count = 0
+    for _ in _solutions(state, state.empty_cells(), stats, mrv=True):
+        count += 1
+        if count >= max_solutions:
+            break
     return count
 
+def _choose_mrv(state, empties, start):
+    """Swap the open cell with the fewest candidates into empties[start]; returns its mask.
+
+    Ties go to the first such cell. _choose_mrv_degree and _choose_mrv_random
+    break them differently, at the cost of a full scan.
+    """
+    rows, cols, boxes = state.rows, state.cols, state.boxes
+    best_pos = start
+    best_mask = 0
+    best_size = 10
+    for pos in range(start, len(empties)):
+        idx = empties[pos]
+        mask = FULL & ~(rows[ROW_OF[idx]] | cols[COL_OF[idx]] | boxes[BOX_OF[idx]])
+        size = MASK_SIZE[mask]
+        if size < best_size:
+            best_pos, best_mask, best_size = pos, mask, size
+            if size <= 1:
+                break
+    empties[start], empties[best_pos] = empties[best_pos], empties[start]
+    return best_mask
+
+def _fewest_candidates(state, empties, start):
+    """Positions in empties[start:] of the open cells with the fewest candidates."""
+    candidates = state.candidates
+    best = []
+    best_size = 10
+    for pos in range(start, len(empties)):
+        size = MASK_SIZE[candidates(empties[pos])]
+        if size < best_size:
+            best = [pos]
+            best_size = size
+            if size == 0:
+                break
+        elif size == best_size:
+            best.append(pos)
+    return best
+
+def _swap_to(state, empties, start, pos):
+    empties[start], empties[pos] = empties[pos], empties[start]
+    return state.candidates(empties[start])
+
+def _choose_mrv_degree(state, empties, start):
+    """_choose_mrv, breaking ties by the most unassigned peers."""
+    best = _fewest_candidates(state, empties, start)
+    if len(best) > 1:
+        cells = state.cells
+        best = [max(best, key=lambda pos: sum(1 for peer in PEERS[empties[pos]] if cells[peer] == 0))]
+    return _swap_to(state, empties, start, best[0])
+
+def _choose_mrv_random(state, empties, start):
+    """_choose_mrv, breaking ties at random."""
+    return _swap_to(state, empties, start, random.choice(_fewest_candidates(state, empties, start)))
+
+def _order_lcv(state, idx, digits):
+    """Digits ruling out the fewest options of unassigned peers first."""
+    cells = state.cells
+    peer_masks = [state.candidates(peer) for peer in PEERS[idx] if cells[peer] == 0]
+    return sorted(digits, key=lambda num: sum(1 for mask in peer_masks if mask >> (num - 1) & 1))
+
+def _order_random(state, idx, digits):
+    return random.sample(digits, len(digits))
+
+# Variable and value orderings of STRATEGIES, as the choose and order hooks of _solutions
+_CHOOSERS = {"static": None, "mrv": _choose_mrv, "mrv_degree": _choose_mrv_degree, "mrv_random": _choose_mrv_random}
+_ORDERS = {"ascending": None, "lcv": _order_lcv, "random": _order_random}
+
+def _solutions(state, empties, stats = None, shuffle = False, mrv = False, choose = None, order = None):
+    """Depth-first search over empties, yielding each time the board is full.
+
+    Iterative: the stack holds, per depth, an iterator over the candidates of
+    empties[depth] and the value placed there, so no Python frame is needed
+    per cell. At each yield state holds a solution; resuming undoes it and
+    continues, so the search can be paused, resumed or abandoned at any
+    solution. Closing the generator early (or a BudgetExceeded) restores
+    state to how it was before the search. A BudgetExceeded raised here
+    carries the unexplored part of the search in its branches attribute
+    (see _open_branches), so another search can take it over.
+
+    Cells are taken in the order of empties, or with mrv the open cell with
+    the fewest candidates next (empties is then reordered in place). With
+    shuffle the candidates of each cell are tried in random order.
+
+    choose and order replace these orderings: choose(state, empties, start)
+    swaps the next cell into empties[start] and returns its candidate mask,
+    order(state, idx, digits) gives the order to try digits in (see
+    STRATEGIES).
+    """
+    n = len(empties)
+    if n == 0:
+        yield
+        return
+    if mrv and choose is None:
+        choose = _choose_mrv
+    if shuffle and order is None:
+        order = _order_random
+
+    cells, rows, cols, boxes = state.cells, state.rows, state.cols, state.boxes
+    candidates = [None] * n
+    placed = [0] * n
+    # Solutions found when the value at each depth was placed (for backtracks)
+    found_at = [0] * n
+    found = 0
+
+    depth = 0
+    if choose is not None:
+        mask = choose(state, empties, 0)
+    idx = empties[0]
+    r, c, b = ROW_OF[idx], COL_OF[idx], BOX_OF[idx]
+    if choose is None:
+        mask = FULL & ~(rows[r] | cols[c] | boxes[b])
+    digits = MASK_DIGITS[mask]
+    candidates[0] = iter(digits if order is None else order(state, idx, digits))
+
+    try:
+        while True:
+            num = next(candidates[depth], 0)
+            if num == 0:
+                # Candidates exhausted: step back and undo the parent's value
+                depth -= 1
+                if depth < 0:
+                    return
+                idx = empties[depth]
+                r, c, b = ROW_OF[idx], COL_OF[idx], BOX_OF[idx]
+                bit = placed[depth]
+                cells[idx] = 0
+                rows[r] ^= bit
+                cols[c] ^= bit
+                boxes[b] ^= bit
+                if stats is not None and found == found_at[depth]:
+                    stats.backtracks += 1
+                continue
+
+            bit = 1 << (num - 1)
+            cells[idx] = num
+            rows[r] |= bit
+            cols[c] |= bit
+            boxes[b] |= bit
+            placed[depth] = bit
+            if stats is not None:
+                stats.nodes += 1
+                if stats.nodes >= stats.next_check:
+                    try:
+                        stats.check_budget()
+                    except BudgetExceeded as exc:
+                        exc.branches = _open_branches(cells, empties, candidates, depth)
+                        raise
+                if depth >= stats.max_depth:
+                    stats.max_depth = depth + 1
+                found_at[depth] = found
+
+            if depth + 1 == n:
+                found += 1
+                yield
+                cells[idx] = 0
+                rows[r] ^= bit
+                cols[c] ^= bit
+                boxes[b] ^= bit
+                continue
+
+            if choose is not None:
+                mask = choose(state, empties, depth + 1)
+            else:
+                nxt = empties[depth + 1]
+                mask = FULL & ~(rows[ROW_OF[nxt]] | cols[COL_OF[nxt]] | boxes[BOX_OF[nxt]])
+            if not mask:
+                # Dead end one level down: undo here instead of descending
+                cells[idx] = 0
+                rows[r] ^= bit
+                cols[c] ^= bit
+                boxes[b] ^= bit
+                if stats is not None:
+                    stats.backtracks += 1
+                continue
+
+            depth += 1
+            idx = empties[depth]
+            r, c, b = ROW_OF[idx], COL_OF[idx], BOX_OF[idx]
+            digits = MASK_DIGITS[mask]
+            candidates[depth] = iter(digits if order is None else order(state, idx, digits))
+    finally:
+        # Only reached with values still placed if the search was cut short
+        for d in range(depth + 1):
+            idx = empties[d]
+            if cells[idx]:
+                bit = placed[d]
+                cells[idx] = 0
+                rows[ROW_OF[idx]] ^= bit
+                cols[COL_OF[idx]] ^= bit
+                boxes[BOX_OF[idx]] ^= bit
+
+def _open_branches(cells, empties, candidates, depth):
+    """The unexplored part of an interrupted _solutions search, as assignment lists.
+
+    Each branch is a list of (idx, num) which, applied to the board the search
+    started from, gives an independent subproblem: the subtree under the value
+    just placed at depth, plus every untried candidate at each depth up to it.
+    Consumes the candidate iterators.
+    """
+    path = [(empties[d], cells[empties[d]]) for d in range(depth + 1)]
+    branches = [path]
+    for d in range(depth + 1):
+        for num in candidates[d]:
+            branches.append(path[:d] + [(empties[d], num)])
+    return branches
+
 def find_empty_location(board, start_i = 0, start_j = 0):
     for j in range(start_j, 9):
         if board[start_i][j] == 0:
@@ -119,25 +418,12 @@ def is_safe(board, row, col, num):
 
     return True
 
-def fill_board(board):
-    empty = find_empty_location(board, 0, 0)
+def fill_board(board, stats = None):
+    state = BoardState(board)
 
-    if not empty:
+    for _ in _solutions(state, state.empty_cells(), stats, shuffle=True):
+        state.write_to(board)
         return True
-    
-    row, col = empty
-
-    candidates = list(range(1, 10))
-    random.shuffle(candidates)
-
-    for num in candidates:
-        if is_safe(board, row, col, num):
-            board[row][col] = num
-
-            if fill_board(board):
-                return True
-
-            board[row][col] = 0
 
     return False
 
@@ -0,0 +1,118 @@
+"""Solve many boards at once across a pool of worker processes."""
+
+import copy
+import os
+import time
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+
+import backtracking
+import dlx
+import solver
+from stats import BudgetExceeded, SearchStats
+
+DEFAULT_WORKERS = int(os.environ.get("SUDOKU_BATCH_WORKERS", os.cpu_count() or 1))
+MAX_CHUNK = 64
+
+
+def _solve_backtracking(board, stats):
+    solution = backtracking.get_solution(copy.deepcopy(board), stats=stats)
+    return {"solution": solution, "solvable": solution is not None}
+
+
+def _solve_arc_backtracking(board, stats):
+    solution, trace, solvable = solver.solve(copy.deepcopy(board), level="none", stats=stats)
+    return {"solution": solution, "solvable": solvable}
+
+
+def _solve_dlx(board, stats):
+    solution = dlx.get_solution(board, stats)
+    return {"solution": solution, "solvable": solution is not None}
+
+
+SOLVERS = {
+    "backtracking": _solve_backtracking,
+    "arc-backtracking": _solve_arc_backtracking,
+    "dlx": _solve_dlx,
+}
+
+_pool = None
+
+
+def get_pool():
+    """Return the shared pool of DEFAULT_WORKERS processes, creating it once."""
+    global _pool
+    if _pool is None:
+        _pool = ProcessPoolExecutor(max_workers=DEFAULT_WORKERS)
+    return _pool
+
+
+def _solve_chunk(solver_name, chunk, time_limit=None, max_nodes=None):
+    solve = SOLVERS[solver_name]
+    results = []
+    for index, board in chunk:
+        stats = SearchStats(time_limit, max_nodes)
+        start = time.perf_counter()
+        try:
+            result = solve(board, stats)
+        except BudgetExceeded as exc:
+            result = {"solution": None, "solvable": None, "budget_exceeded": exc.reason}
+        time_taken = (time.perf_counter() - start) * 1000
+        result["index"] = index
+        result["time_taken_ms"] = time_taken
+        result["stats"] = stats.to_dict(time_taken)
+        results.append(result)
+    return results
+
+
+def _chunks(boards, workers):
+    # Several chunks per worker so a slow chunk does not hold up the others
+    size = max(1, min(MAX_CHUNK, len(boards) // (workers * 4)))
+    indexed = list(enumerate(boards))
+    return [indexed[k:k + size] for k in range(0, len(indexed), size)]
+
+
+def iter_solve_batch(boards, solver_name="dlx", workers=None, time_limit=None, max_nodes=None):
+    """Yield per-board results (with their "index") as soon as they finish.
+
+    At most workers chunks run at a time, on the shared pool of get_pool().
+
+    time_limit (seconds) and max_nodes apply to each board separately; a
+    board that runs out of budget gets solvable None and "budget_exceeded".
+    """
+    workers = workers or DEFAULT_WORKERS
+    if workers == 1:
+        for chunk in _chunks(boards, 1):
+            yield from _solve_chunk(solver_name, chunk, time_limit, max_nodes)
+        return
+
+    # All batches share one pool; workers caps how many chunks this one has in flight
+    pool = get_pool()
+    pending = deque(_chunks(boards, workers))
+    running = set()
+    while pending or running:
+        while pending and len(running) < workers:
+            running.add(pool.submit(_solve_chunk, solver_name, pending.popleft(), time_limit, max_nodes))
+        done, running = wait(running, return_when=FIRST_COMPLETED)
+        for future in done:
+            yield from future.result()
+
+
+def solve_batch(boards, solver_name="dlx", workers=None, time_limit=None, max_nodes=None):
+    """Solve all boards; returns (results in input order, aggregate stats)."""
+    start = time.perf_counter()
+    results = [None] * len(boards)
+    for result in iter_solve_batch(boards, solver_name, workers, time_limit, max_nodes):
+        results[result["index"]] = result
+    wall_time = (time.perf_counter() - start) * 1000
+
+    solve_times = [result["time_taken_ms"] for result in results]
+    stats = {
+        "count": len(results),
+        "solved": sum(1 for result in results if result["solvable"]),
+        "budget_exceeded": sum(1 for result in results if "budget_exceeded" in result),
+        "time_taken_ms": wall_time,
+        "total_solve_time_ms": sum(solve_times),
+        "max_solve_time_ms": max(solve_times, default=0),
+    }
+    return results, stats
@@ -0,0 +1,294 @@
+"""Benchmark the solver engines over the bundled puzzle corpus.
+
+    python benchmark.py run [--engines E ...] [--categories C ...] [--repeat N]
+                            [--timeout SECONDS] [--json] [--output FILE]
+    python benchmark.py compare BASELINE.json CURRENT.json [--threshold 0.25]
+
+Each (engine, category) group runs in its own process so a pathological
+puzzle can be cut off by --timeout without losing the other results.
+Latencies are measured without tracing; peak memory comes from a separate
+tracemalloc pass over each puzzle. `compare` exits with status 1 when a
+latency, node count or timeout count regressed beyond the threshold.
+"""
+
+import argparse
+import copy
+import json
+import math
+import multiprocessing
+import platform
+import sys
+import time
+import tracemalloc
+
+import arc
+import backtracking
+import dlx
+import solver
+from corpus import load
+from generate_board import generate_puzzle
+from stats import SearchStats
+
+# Latency differences below this are treated as noise by compare
+MIN_REGRESSION_MS = 0.5
+# Seconds generate_puzzle may spend on one puzzle before returning the sparsest so far
+GENERATE_TIME_BUDGET = 5.0
+
+
+def _solver_solve(board):
+    stats = SearchStats()
+    solver.solve(board, level="none", stats=stats)
+    return stats.nodes
+
+
+def _get_solution(board):
+    stats = SearchStats()
+    backtracking.get_solution(board, stats=stats)
+    return stats.nodes
+
+
+def _solvable(board):
+    stats = SearchStats()
+    backtracking.solvable(board, stats=stats)
+    return stats.nodes
+
+
+def _count(board):
+    stats = SearchStats()
+    backtracking.get_number_of_solutions(board, stats=stats)
+    return stats.nodes
+
+
+def _analyze(board):
+    stats = SearchStats()
+    backtracking.analyze(board, stats=stats)
+    return stats.nodes
+
+
+def _arc(board):
+    arc.arc(board, level="none")
+
+
+def _dlx(board):
+    stats = SearchStats()
+    dlx.get_solution(board, stats)
+    return stats.nodes
+
+
+def _generate(board):
+    # board only sets the clue count: this times generating a new puzzle that
+    # sparse (random grid plus clue removal), cut off at GENERATE_TIME_BUDGET
+    generate_puzzle(sum(1 for row in board for cell in row if cell != 0), GENERATE_TIME_BUDGET)
+
+
+# engine name -> (function(board) returning nodes or None, categories it skips)
+ENGINES = {
+    "backtracking.get_solution": (_get_solution, ()),
+    "backtracking.solvable": (_solvable, ()),
+    "backtracking.get_number_of_solutions": (_count, ()),
+    "backtracking.analyze": (_analyze, ()),
+    "solver.solve": (_solver_solve, ()),
+    "arc.arc": (_arc, ()),
+    "dlx.get_solution": (_dlx, ()),
+    "generate_puzzle": (_generate, ("unsolvable",)),
+}
+
+
+def percentile(values, fraction):
+    """Nearest-rank percentile of a non-empty list: the value at rank ceil(fraction * n)."""
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, max(0, math.ceil(fraction * len(ordered)) - 1))]
+
+
+def _run_group(engine, boards, repeat, conn):
+    run = ENGINES[engine][0]
+    for board in boards:
+        latencies = []
+        nodes = None
+        for _ in range(repeat):
+            working = copy.deepcopy(board)
+            start = time.perf_counter()
+            nodes = run(working)
+            latencies.append((time.perf_counter() - start) * 1000)
+
+        tracemalloc.start()
+        run(copy.deepcopy(board))
+        peak = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+
+        conn.send((latencies, nodes, peak))
+    conn.send(None)
+
+
+def _measure(engine, boards, repeat, timeout):
+    receiver, sender = multiprocessing.Pipe(duplex=False)
+    process = multiprocessing.Process(target=_run_group, args=(engine, boards, repeat, sender), daemon=True)
+    process.start()
+    sender.close()
+
+    samples = []
+    deadline = time.monotonic() + timeout
+    finished = False
+    while not finished:
+        remaining = deadline - time.monotonic()
+        if remaining <= 0 or not receiver.poll(remaining):
+            break
+        try:
+            message = receiver.recv()
+        except EOFError:
+            break
+        if message is None:
+            finished = True
+        else:
+            samples.append(message)
+
+    if process.is_alive():
+        process.terminate()
+    process.join()
+    return samples
+
+
+def _summarize(samples, total):
+    latencies = [latency for sample in samples for latency in sample[0]]
+    nodes = [sample[1] for sample in samples if sample[1] is not None]
+    summary = {
+        "puzzles": total,
+        "completed": len(samples),
+        "timeouts": total - len(samples),
+        "latency_ms": None,
+        "nodes": None,
+        "peak_memory_kb": None,
+    }
+    if latencies:
+        summary["latency_ms"] = {
+            "p50": percentile(latencies, 0.50),
+            "p90": percentile(latencies, 0.90),
+            "p99": percentile(latencies, 0.99),
+            "max": max(latencies),
+            "mean": sum(latencies) / len(latencies),
+        }
+        summary["peak_memory_kb"] = max(sample[2] for sample in samples) / 1024
+    if nodes:
+        summary["nodes"] = {"mean": sum(nodes) / len(nodes), "max": max(nodes)}
+    return summary
+
+
+def run_benchmark(engines=None, categories=None, repeat=3, timeout=60.0, progress=None):
+    corpus = load(categories)
+    results = {}
+    for engine in engines or list(ENGINES):
+        skipped = ENGINES[engine][1]
+        results[engine] = {}
+        for category, boards in corpus.items():
+            if category in skipped:
+                continue
+            samples = _measure(engine, boards, repeat, timeout)
+            results[engine][category] = _summarize(samples, len(boards))
+            if progress:
+                progress(engine, category, results[engine][category])
+    return {
+        "meta": {
+            "python": platform.python_version(),
+            "repeat": repeat,
+            "timeout_s": timeout,
+            "timestamp": time.time(),
+        },
+        "results": results,
+    }
+
+
+def _format_row(engine, category, summary):
+    latency = summary["latency_ms"]
+    nodes = summary["nodes"]
+    cells = [engine.ljust(40), category.ljust(11)]
+    if latency:
+        cells += [f"{latency[key]:10.2f}" for key in ("p50", "p90", "p99")]
+    else:
+        cells += ["         -"] * 3
+    cells.append(f"{nodes['mean']:10.0f}" if nodes else "         -")
+    cells.append(f"{summary['peak_memory_kb']:10.1f}" if summary["peak_memory_kb"] is not None else "         -")
+    cells.append(f"{summary['timeouts']:8d}")
+    return " ".join(cells)
+
+
+def print_table(report):
+    header = " ".join(["engine".ljust(40), "category".ljust(11), "p50 ms".rjust(10), "p90 ms".rjust(10),
+                       "p99 ms".rjust(10), "nodes".rjust(10), "peak KB".rjust(10), "timeouts".rjust(8)])
+    print(header)
+    print("-" * len(header))
+    for engine, categories in report["results"].items():
+        for category, summary in categories.items():
+            print(_format_row(engine, category, summary))
+
+
+def compare(baseline, current, threshold=0.25):
+    """Return a list of regression messages of current against baseline."""
+    regressions = []
+    for engine, categories in current["results"].items():
+        for category, summary in categories.items():
+            before = baseline["results"].get(engine, {}).get(category)
+            if before is None:
+                continue
+            name = f"{engine} [{category}]"
+            if summary["timeouts"] > before["timeouts"]:
+                regressions.append(f"{name}: timeouts {before['timeouts']} -> {summary['timeouts']}")
+            if before["latency_ms"] and summary["latency_ms"]:
+                for key in ("p50", "p90", "p99"):
+                    old, new = before["latency_ms"][key], summary["latency_ms"][key]
+                    if new > old * (1 + threshold) and new - old > MIN_REGRESSION_MS:
+                        regressions.append(f"{name}: {key} {old:.2f}ms -> {new:.2f}ms")
+            if before["nodes"] and summary["nodes"]:
+                old, new = before["nodes"]["mean"], summary["nodes"]["mean"]
+                if new > old * (1 + threshold):
+                    regressions.append(f"{name}: nodes {old:.0f} -> {new:.0f}")
+    return regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark the sudoku solver engines.")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    run = commands.add_parser("run", help="run the benchmark over the corpus")
+    run.add_argument("--engines", nargs="+", choices=list(ENGINES), help="engines to run (default: all)")
+    run.add_argument("--categories", nargs="+", choices=["easy", "hard", "seventeen", "unsolvable"],
+                     help="corpus categories (default: all)")
+    run.add_argument("--repeat", type=int, default=3, help="timed runs per puzzle")
+    run.add_argument("--timeout", type=float, default=60.0, help="seconds per engine and category")
+    run.add_argument("--json", action="store_true", help="print JSON instead of a table")
+    run.add_argument("--output", help="also write the JSON report to this file")
+
+    cmp = commands.add_parser("compare", help="flag regressions against a saved baseline")
+    cmp.add_argument("baseline")
+    cmp.add_argument("current")
+    cmp.add_argument("--threshold", type=float, default=0.25, help="allowed relative slowdown")
+
+    args = parser.parse_args(argv)
+
+    if args.command == "run":
+        def progress(engine, category, summary):
+            print(f"{engine} [{category}] done", file=sys.stderr)
+
+        report = run_benchmark(args.engines, args.categories, args.repeat, args.timeout, progress)
+        if args.output:
+            with open(args.output, "w") as f:
+                json.dump(report, f, indent=2)
+        if args.json:
+            print(json.dumps(report, indent=2))
+        else:
+            print_table(report)
+        return 0
+
+    with open(args.baseline) as f:
+        baseline = json.load(f)
+    with open(args.current) as f:
+        current = json.load(f)
+    regressions = compare(baseline, current, args.threshold)
+    for message in regressions:
+        print("REGRESSION " + message)
+    if not regressions:
+        print("No regressions.")
+    return 1 if regressions else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,70 @@
+"""Compact board encodings: 81-character strings and packed 4-bit records.
+
+string: one character per cell in row-major order, '1'-'9' for digits and
+'0' or '.' for empty cells.
+
+packed: two cells per byte, high nibble first, 41 bytes per board; the low
+nibble of the last byte is padding and must be 0.
+
+Both are checked with bytes.translate over the whole input, so validation
+is a single pass in C rather than a Python loop over cells.
+"""
+
+STRING_LENGTH = 81
+PACKED_SIZE = 41
+
+_DIGITS = b"0123456789."
+# character -> cell value, and back
+_TO_VALUE = bytes.maketrans(_DIGITS, bytes(range(10)) + b"\0")
+_TO_CHAR = bytes.maketrans(bytes(range(10)), b"0123456789")
+# Bytes whose two nibbles are both a cell value (0-9)
+_VALID_PACKED = bytes(hi << 4 | lo for hi in range(10) for lo in range(10))
+_HIGH = bytes(b >> 4 for b in range(256))
+_LOW = bytes(b & 0xF for b in range(256))
+
+
+def _rows(values):
+    return [list(values[i:i + 9]) for i in range(0, 81, 9)]
+
+
+def from_string(text):
+    """81-character string (str or bytes) to a 9x9 list, or None if malformed."""
+    if isinstance(text, str):
+        if not text.isascii():
+            return None
+        text = text.encode("ascii")
+    if len(text) != STRING_LENGTH or text.translate(None, _DIGITS):
+        return None
+    return _rows(text.translate(_TO_VALUE))
+
+
+def to_string(board):
+    return bytes(value for row in board for value in row).translate(_TO_CHAR).decode("ascii")
+
+
+def unpack(data):
+    """41 packed bytes to a 9x9 list, or None if malformed."""
+    if len(data) != PACKED_SIZE or data.translate(None, _VALID_PACKED) or data[-1] & 0xF:
+        return None
+    values = bytearray(82)
+    values[0::2] = data.translate(_HIGH)
+    values[1::2] = data.translate(_LOW)
+    return _rows(values)
+
+
+def pack(board):
+    cells = [value for row in board for value in row]
+    cells.append(0)
+    return bytes(hi << 4 | lo for hi, lo in zip(cells[0::2], cells[1::2]))
+
+
+def parse_lines(body):
+    """Boards of a text body with one 81-character puzzle per line; None for malformed lines."""
+    return [from_string(line.strip()) for line in body.splitlines() if line.strip()]
+
+
+def parse_packed(body):
+    """Boards of a body of concatenated packed records; raises ValueError for a partial record."""
+    if len(body) % PACKED_SIZE:
+        raise ValueError(f"packed body must be a multiple of {PACKED_SIZE} bytes")
+    return [unpack(body[k:k + PACKED_SIZE]) for k in range(0, len(body), PACKED_SIZE)]
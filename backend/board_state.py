@@ -0,0 +1,80 @@
+"""Compact board state with per-row, per-column and per-box occupancy masks.
+
+Cells are addressed by a flat index 0..80 (row * 9 + col). Digit d is stored
+as bit (d - 1) of a 9-bit mask, so the candidates of an empty cell are
+FULL & ~(rows[r] | cols[c] | boxes[b]).
+"""
+
+FULL = 0x1FF
+
+ROW_OF = [idx // 9 for idx in range(81)]
+COL_OF = [idx % 9 for idx in range(81)]
+BOX_OF = [(idx // 27) * 3 + (idx % 9) // 3 for idx in range(81)]
+
+# Digits contained in each 9-bit mask, in ascending order.
+MASK_DIGITS = [[d + 1 for d in range(9) if mask >> d & 1] for mask in range(512)]
+MASK_SIZE = [len(digits) for digits in MASK_DIGITS]
+
+
+def _peers(idx):
+    row, col, box = ROW_OF[idx], COL_OF[idx], BOX_OF[idx]
+    return [other for other in range(81) if other != idx and (
+        ROW_OF[other] == row or COL_OF[other] == col or BOX_OF[other] == box)]
+
+
+PEERS = [_peers(idx) for idx in range(81)]
+
+ROW_CELLS = [[row * 9 + col for col in range(9)] for row in range(9)]
+COL_CELLS = [[row * 9 + col for row in range(9)] for col in range(9)]
+BOX_CELLS = [[idx for idx in range(81) if BOX_OF[idx] == box] for box in range(9)]
+UNITS = ROW_CELLS + COL_CELLS + BOX_CELLS
+
+
+class BoardState:
+    """Board values plus incrementally maintained unit occupancy masks."""
+
+    __slots__ = ("cells", "rows", "cols", "boxes")
+
+    def __init__(self, board):
+        self.cells = [0] * 81
+        self.rows = [0] * 9
+        self.cols = [0] * 9
+        self.boxes = [0] * 9
+        for i in range(9):
+            for j in range(9):
+                if board[i][j] != 0:
+                    self.assign(i * 9 + j, board[i][j])
+
+    def candidates(self, idx):
+        """Mask of digits that can legally be placed in cell idx."""
+        return FULL & ~(self.rows[ROW_OF[idx]] | self.cols[COL_OF[idx]] | self.boxes[BOX_OF[idx]])
+
+    def is_safe(self, idx, num):
+        return not (self.rows[ROW_OF[idx]] | self.cols[COL_OF[idx]] | self.boxes[BOX_OF[idx]]) >> (num - 1) & 1
+
+    def assign(self, idx, num):
+        bit = 1 << (num - 1)
+        self.cells[idx] = num
+        self.rows[ROW_OF[idx]] |= bit
+        self.cols[COL_OF[idx]] |= bit
+        self.boxes[BOX_OF[idx]] |= bit
+
+    def unassign(self, idx):
+        clear = ~(1 << (self.cells[idx] - 1))
+        self.cells[idx] = 0
+        self.rows[ROW_OF[idx]] &= clear
+        self.cols[COL_OF[idx]] &= clear
+        self.boxes[BOX_OF[idx]] &= clear
+
+    def empty_cells(self, start=0):
+        return [idx for idx in range(start, 81) if self.cells[idx] == 0]
+
+    def to_board(self):
+        cells = self.cells
+        return [cells[i * 9:i * 9 + 9] for i in range(9)]
+
+    def write_to(self, board):
+        """Copy the state's values back into a nested-list board in place."""
+        cells = self.cells
+        for i in range(9):
+            board[i][:] = cells[i * 9:i * 9 + 9]
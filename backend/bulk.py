@@ -0,0 +1,209 @@
+"""Vectorized validation and candidate masks for many boards at once.
+
+Boards are an N x 9 x 9 integer array (or anything np.asarray turns into
+one). Every check is a handful of NumPy operations over the whole batch, so
+ingesting large puzzle dumps does not walk cells one by one in Python.
+
+Candidate masks use the same encoding as board_state: digit d is bit d - 1,
+and a filled cell has mask 0.
+
+    python bulk.py validate PUZZLES [--candidates FILE] [--chunk N]
+
+reads one 81-character puzzle per line ('0' or '.' for empty cells, .gz
+accepted), prints a JSON line for every invalid puzzle and a summary on
+stderr. --candidates writes the masks of every well-formed puzzle, in input
+order, as little-endian uint16 records of 81 values.
+"""
+
+import argparse
+import gzip
+import json
+import sys
+import time
+
+import numpy as np
+
+FULL = 0x1FF
+_DIGITS = np.arange(1, 10, dtype=np.int8)
+
+
+def to_array(boards):
+    """Return (N x 9 x 9 int8 array, N bools: all values within 0-9).
+
+    Raises ValueError unless boards is a batch of 9x9 integer grids. Values
+    outside 0-9 are replaced by 0 in the array and flagged instead.
+    """
+    try:
+        array = np.asarray(boards)
+    except ValueError:
+        raise ValueError("boards must be a list of 9x9 integer arrays")
+    if array.ndim != 3 or array.shape[1:] != (9, 9):
+        raise ValueError("boards must be a list of 9x9 integer arrays")
+    if array.size and array.dtype.kind not in "iu":
+        raise ValueError("boards must contain only integers")
+    in_range = (array >= 0) & (array <= 9)
+    return np.where(in_range, array, 0).astype(np.int8), in_range.all(axis=(1, 2))
+
+
+def _per_box(counts):
+    """Expand per-box values of shape (N, 3, 3, ...) to every cell: (N, 9, 9, ...)."""
+    return np.repeat(np.repeat(counts, 3, axis=1), 3, axis=2)
+
+
+def _unit_counts(array):
+    """Occurrences of each digit per row, column and box, each of shape (N, 9, 9)."""
+    onehot = array[..., None] == _DIGITS
+    rows = onehot.sum(axis=2, dtype=np.int8)
+    cols = onehot.sum(axis=1, dtype=np.int8)
+    boxes = onehot.reshape(-1, 3, 3, 3, 3, 9).sum(axis=(2, 4), dtype=np.int8)
+    return onehot, rows, cols, boxes
+
+
+def duplicates(array):
+    """Boolean N x 9 x 9 mask of the filled cells that repeat a digit in their row, column or box."""
+    onehot, rows, cols, boxes = _unit_counts(array)
+    repeated = (rows[:, :, None, :] > 1) | (cols[:, None, :, :] > 1) | (_per_box(boxes) > 1)
+    return (onehot & repeated).any(axis=3)
+
+
+def candidate_masks(array):
+    """uint16 N x 9 x 9 masks of the digits each empty cell can still take."""
+    shifts = np.maximum(array.astype(np.int16) - 1, 0)
+    bits = np.where(array > 0, np.left_shift(1, shifts), 0).astype(np.uint16)
+    rows = np.bitwise_or.reduce(bits, axis=2)
+    cols = np.bitwise_or.reduce(bits, axis=1)
+    boxes = np.bitwise_or.reduce(bits.reshape(-1, 3, 3, 3, 3), axis=(2, 4))
+    used = rows[:, :, None] | cols[:, None, :] | _per_box(boxes)
+    return np.where(array == 0, FULL & ~used, 0).astype(np.uint16)
+
+
+def validate(boards, candidates=False):
+    """Validate a batch of boards.
+
+    Returns a dict of arrays: valid (N bools), in_range (N bools: every value
+    within 0-9), duplicates (N x 9 x 9 bools), dead_end (N bools: an empty
+    cell has no candidates left, so the board cannot be solved) and, with
+    candidates, candidates (N x 9 x 9 uint16 masks).
+    """
+    array, in_range = to_array(boards)
+    dups = duplicates(array)
+    masks = candidate_masks(array)
+    dead_end = ((array == 0) & (masks == 0)).any(axis=(1, 2))
+    result = {
+        "valid": in_range & ~dups.any(axis=(1, 2)),
+        "in_range": in_range,
+        "duplicates": dups,
+        "dead_end": dead_end,
+    }
+    if candidates:
+        result["candidates"] = masks
+    return result
+
+
+def report(result, offset=0):
+    """Per-board JSON-friendly dicts for the invalid boards of a validate() result."""
+    invalid = []
+    for index in np.flatnonzero(~result["valid"]):
+        entry = {"index": int(index) + offset}
+        if not result["in_range"][index]:
+            entry["error"] = "values outside 0-9"
+        else:
+            entry["duplicates"] = np.argwhere(result["duplicates"][index]).tolist()
+        invalid.append(entry)
+    return invalid
+
+
+def to_dicts(result):
+    """One JSON-friendly dict per board of a validate() result."""
+    boards = []
+    for index in range(len(result["valid"])):
+        entry = {
+            "valid": bool(result["valid"][index]),
+            "duplicates": np.argwhere(result["duplicates"][index]).tolist(),
+            "dead_end": bool(result["dead_end"][index]),
+        }
+        if "candidates" in result:
+            entry["candidates"] = result["candidates"][index].tolist()
+        boards.append(entry)
+    return boards
+
+
+def parse_lines(lines):
+    """Parse 81-character puzzle lines (bytes).
+
+    Returns (M x 9 x 9 array of the well-formed lines, their indexes in
+    lines, indexes of lines that are not 81 characters long).
+    """
+    lengths = np.fromiter((len(line) for line in lines), dtype=np.int64, count=len(lines))
+    good = np.flatnonzero(lengths == 81)
+    raw = np.frombuffer(b"".join(lines[i] for i in good), dtype=np.uint8).reshape(-1, 81)
+    raw = np.where(raw == ord("."), ord("0"), raw)
+    digits = raw.astype(np.int16) - ord("0")
+    # Any other character becomes an out-of-range value and fails validation
+    digits = np.where((digits >= 0) & (digits <= 9), digits, -1)
+    bad = np.flatnonzero(lengths != 81)
+    return digits.reshape(-1, 9, 9), good, bad
+
+
+def read_chunks(path, size):
+    """Yield lists of up to size non-blank, stripped lines (bytes) of a file, gzipped or not."""
+    opener = gzip.open if path.endswith(".gz") else open
+    with opener(path, "rb") as f:
+        chunk = []
+        for line in f:
+            line = line.strip()
+            if line:
+                chunk.append(line)
+            if len(chunk) == size:
+                yield chunk
+                chunk = []
+        if chunk:
+            yield chunk
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Validate puzzle dumps with vectorized checks.")
+    commands = parser.add_subparsers(dest="command", required=True)
+    check = commands.add_parser("validate", help="validate one puzzle per line")
+    check.add_argument("puzzles", help="file of 81-character puzzles, optionally gzipped")
+    check.add_argument("--candidates", help="write candidate masks (uint16 x 81 per puzzle) to this file")
+    check.add_argument("--chunk", type=int, default=100000, help="puzzles validated per batch")
+    args = parser.parse_args(argv)
+
+    start = time.perf_counter()
+    total = valid = dead_ends = 0
+    masks_out = open(args.candidates, "wb") if args.candidates else None
+    try:
+        for lines in read_chunks(args.puzzles, args.chunk):
+            array, good, bad = parse_lines(lines)
+            for index in bad:
+                print(json.dumps({"line": total + int(index) + 1, "error": "not 81 characters"}))
+
+            result = validate(array, candidates=masks_out is not None)
+            for entry in report(result):
+                entry["line"] = total + int(good[entry.pop("index")]) + 1
+                print(json.dumps(entry))
+            if masks_out is not None:
+                masks_out.write(result["candidates"].astype("<u2").tobytes())
+
+            total += len(lines)
+            valid += int(result["valid"].sum())
+            dead_ends += int((result["valid"] & result["dead_end"]).sum())
+    finally:
+        if masks_out is not None:
+            masks_out.close()
+
+    elapsed = time.perf_counter() - start
+    print(json.dumps({
+        "puzzles": total,
+        "valid": valid,
+        "invalid": total - valid,
+        "dead_ends": dead_ends,
+        "time_taken_s": elapsed,
+        "puzzles_per_s": total / elapsed if elapsed else None,
+    }), file=sys.stderr)
+    return 0 if valid == total else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,150 @@
+"""Solve puzzle dumps from the command line with constant memory.
+
+    python bulk_solve.py PUZZLES -o SOLUTIONS [--solver dlx] [--workers N]
+
+PUZZLES holds one 81-character puzzle per line ('0' or '.' for empty cells,
+blank lines skipped, .gz read as gzip). The file is read in chunks, each
+chunk is validated with bulk.validate and solved by a worker process, and
+at most --in-flight chunks are read ahead of the writer, so memory stays
+flat however large the input is. SOLUTIONS (gzipped if it ends in .gz,
+stdout for -) gets one line per puzzle, in input order: the 81-character
+solution, or instead one of
+
+    malformed    not 81 characters of digits and '.'
+    invalid      a digit repeats in a row, column or box
+    unsolvable   no solution exists
+    time, nodes  the per-puzzle search budget ran out
+
+Progress and a final throughput summary go to stderr as JSON lines.
+"""
+
+import argparse
+import gzip
+import json
+import sys
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+
+import batch
+import board_format
+import bulk
+from stats import BudgetExceeded, SearchStats
+
+STATUSES = ("solved", "malformed", "invalid", "unsolvable", "budget_exceeded")
+# Seconds between two progress lines
+PROGRESS_EVERY = 5.0
+
+
+def solve_lines(solver_name, lines, time_limit=None, max_nodes=None):
+    """Solve a chunk of puzzle lines; returns (output lines, {status: count})."""
+    array, good, bad = bulk.parse_lines(lines)
+    checked = bulk.validate(array)
+    boards = array.tolist()
+    solve = batch.SOLVERS[solver_name]
+    output = [b"malformed"] * len(lines)
+    counts = dict.fromkeys(STATUSES, 0)
+    counts["malformed"] = len(bad)
+
+    for k, index in enumerate(good):
+        if not checked["in_range"][k]:
+            status, line = "malformed", b"malformed"
+        elif not checked["valid"][k]:
+            status, line = "invalid", b"invalid"
+        elif checked["dead_end"][k]:
+            status, line = "unsolvable", b"unsolvable"
+        else:
+            try:
+                result = solve(boards[k], SearchStats(time_limit, max_nodes))
+            except BudgetExceeded as exc:
+                status, line = "budget_exceeded", exc.reason.encode()
+            else:
+                if result["solvable"]:
+                    status, line = "solved", board_format.to_string(result["solution"]).encode()
+                else:
+                    status, line = "unsolvable", b"unsolvable"
+        output[index] = line
+        counts[status] += 1
+    return output, counts
+
+
+def _open_output(path):
+    if path == "-":
+        return sys.stdout.buffer
+    return gzip.open(path, "wb") if path.endswith(".gz") else open(path, "wb")
+
+
+def solve_file(path, out, solver_name="dlx", workers=None, chunk=256, in_flight=None,
+               time_limit=None, max_nodes=None, progress=None):
+    """Solve every puzzle of path, writing result lines to the binary stream out.
+
+    Returns the summary dict; progress, if given, is called with the running
+    summary about every PROGRESS_EVERY seconds.
+    """
+    workers = workers or batch.DEFAULT_WORKERS
+    in_flight = in_flight or 2 * workers
+    start = time.perf_counter()
+    last_report = start
+    totals = dict.fromkeys(STATUSES, 0)
+    puzzles = 0
+
+    def summary():
+        elapsed = time.perf_counter() - start
+        return {"puzzles": puzzles, **totals, "time_taken_s": elapsed,
+                "puzzles_per_s": puzzles / elapsed if elapsed else None}
+
+    def write(output, counts):
+        nonlocal puzzles, last_report
+        out.write(b"\n".join(output) + b"\n")
+        puzzles += len(output)
+        for status, count in counts.items():
+            totals[status] += count
+        if progress is not None and time.perf_counter() - last_report >= PROGRESS_EVERY:
+            last_report = time.perf_counter()
+            progress(summary())
+
+    if workers == 1:
+        for lines in bulk.read_chunks(path, chunk):
+            write(*solve_lines(solver_name, lines, time_limit, max_nodes))
+        return summary()
+
+    # Futures in input order: the oldest is written before another chunk is read
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        pending = deque()
+        for lines in bulk.read_chunks(path, chunk):
+            if len(pending) >= in_flight:
+                write(*pending.popleft().result())
+            pending.append(pool.submit(solve_lines, solver_name, lines, time_limit, max_nodes))
+        while pending:
+            write(*pending.popleft().result())
+    return summary()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Solve a file of 81-character puzzles.")
+    parser.add_argument("puzzles", help="file of 81-character puzzles, optionally gzipped")
+    parser.add_argument("-o", "--output", default="-", help="solutions file (.gz to compress, - for stdout)")
+    parser.add_argument("--solver", choices=list(batch.SOLVERS), default="dlx")
+    parser.add_argument("--workers", type=int, help=f"worker processes (default: {batch.DEFAULT_WORKERS})")
+    parser.add_argument("--chunk", type=int, default=256, help="puzzles per task")
+    parser.add_argument("--in-flight", type=int, help="chunks read ahead of the writer (default: 2 per worker)")
+    parser.add_argument("--time-limit", type=float, help="seconds per puzzle")
+    parser.add_argument("--max-nodes", type=int, help="search nodes per puzzle")
+    args = parser.parse_args(argv)
+
+    def progress(summary):
+        print(json.dumps(summary), file=sys.stderr)
+
+    out = _open_output(args.output)
+    try:
+        summary = solve_file(args.puzzles, out, args.solver, args.workers, args.chunk, args.in_flight,
+                             args.time_limit, args.max_nodes, progress)
+    finally:
+        if out is not sys.stdout.buffer:
+            out.close()
+    print(json.dumps({"done": True, **summary}), file=sys.stderr)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,232 @@
+"""LRU/TTL cache for solver results, keyed by a canonical form of the board.
+
+Sudoku symmetries (digit relabeling, band/stack permutations, row/column
+permutations inside a band/stack, transposition, and rotations, which are
+combinations of these) preserve solvability and the number of solutions, and
+map solutions to solutions. canonical_form() brings a board into a standard
+orientation and labeling and returns the transform used, so a solution cached
+for one orientation can be mapped back to any equivalent board.
+
+Rows, columns, bands and stacks are ordered by colours that are invariant
+under the symmetries (see _refine), and lines whose colours tie are tried in
+every order, keeping the smallest key. Only boards with more than
+MAX_TIE_ORDERS such orders, which takes a lot of symmetry, fall back to the
+first of them and may land on different entries; that costs a miss, never a
+wrong answer, because every entry is mapped back through its own transform.
+"""
+
+import itertools
+import os
+import threading
+import time
+from collections import OrderedDict
+
+DEFAULT_SIZE = int(os.environ.get("SUDOKU_CACHE_SIZE", 10000))
+DEFAULT_TTL = float(os.environ.get("SUDOKU_CACHE_TTL", 3600))
+# Tie-broken orders compared per orientation; boards with more (very symmetric ones) may miss
+MAX_TIE_ORDERS = int(os.environ.get("SUDOKU_CACHE_MAX_TIE_ORDERS", 1000))
+
+
+def _recolor(signatures):
+    """Replace each signature by its rank among the distinct ones."""
+    rank = {sig: k for k, sig in enumerate(sorted(set(signatures)))}
+    return [rank[sig] for sig in signatures]
+
+
+def _refine(board):
+    """Colour rows and columns by symmetry-invariant signatures; returns (row colours, column colours).
+
+    Rows, columns and digits start out alike and are split by what they
+    contain, in colours of the other two, and rows and columns also by the
+    colours of their band or stack, until no class splits further. The
+    colours only depend on the board up to symmetry.
+    """
+    filled = [(i, j, board[i][j]) for i in range(9) for j in range(9) if board[i][j]]
+    in_row = [[(j, d) for i2, j, d in filled if i2 == i] for i in range(9)]
+    in_col = [[(i, d) for i, j2, d in filled if j2 == j] for j in range(9)]
+    in_digit = [[(i, j) for i, j, d2 in filled if d2 == d] for d in range(10)]
+    rows, cols, digits = [0] * 9, [0] * 9, [0] * 10
+    classes = 3
+    while True:
+        rows, cols, digits = (
+            _recolor([(rows[i], tuple(sorted(rows[k] for k in range(i - i % 3, i - i % 3 + 3))),
+                       tuple(sorted((cols[j], digits[d]) for j, d in in_row[i]))) for i in range(9)]),
+            _recolor([(cols[j], tuple(sorted(cols[k] for k in range(j - j % 3, j - j % 3 + 3))),
+                       tuple(sorted((rows[i], digits[d]) for i, d in in_col[j]))) for j in range(9)]),
+            _recolor([(digits[d], tuple(sorted((rows[i], cols[j]) for i, j in in_digit[d]))) for d in range(10)]),
+        )
+        count = len(set(rows)) + len(set(cols)) + len(set(digits))
+        if count == classes:
+            return rows, cols
+        classes = count
+
+
+def _arrangements(items, key):
+    """Every order of items sorted by key, ties taken in each of their orders."""
+    groups = [list(group) for _, group in itertools.groupby(sorted(items, key=key), key=key)]
+    for choice in itertools.product(*(itertools.permutations(group) for group in groups)):
+        yield [item for group in choice for item in group]
+
+
+def _line_orders(colors):
+    """Row (or column) orders sorted by colour, bands first, with every arrangement of ties."""
+    def band_key(band):
+        return sorted(colors[i] for i in range(band * 3, band * 3 + 3))
+
+    for bands in _arrangements(range(3), band_key):
+        inside = [list(_arrangements(range(band * 3, band * 3 + 3), colors.__getitem__)) for band in bands]
+        for rows in itertools.product(*inside):
+            yield [i for band_rows in rows for i in band_rows]
+
+
+def _transpose(board):
+    return [[board[i][j] for i in range(9)] for j in range(9)]
+
+
+def _apply(src, row_order, col_order):
+    relabel = {0: 0}
+    cells = []
+    for i in row_order:
+        for j in col_order:
+            value = src[i][j]
+            if value not in relabel:
+                relabel[value] = len(relabel)
+            cells.append(relabel[value])
+    # Digits missing from the board take the remaining labels in order
+    for value in range(1, 10):
+        if value not in relabel:
+            relabel[value] = len(relabel)
+    return cells, relabel
+
+
+def canonical_form(board):
+    """Return (key, transform) where key is an 81-char string of the canonical board."""
+    best = None
+    for transposed in (False, True):
+        src = _transpose(board) if transposed else board
+        row_colors, col_colors = _refine(src)
+        col_orders = list(_line_orders(col_colors))
+        orders = itertools.product(_line_orders(row_colors), col_orders)
+        for row_order, col_order in itertools.islice(orders, MAX_TIE_ORDERS):
+            cells, relabel = _apply(src, row_order, col_order)
+            key = "".join(map(str, cells))
+            if best is None or key < best[0]:
+                best = (key, (transposed, row_order, col_order, relabel))
+    return best
+
+
+def to_canonical(board, transform):
+    transposed, row_order, col_order, relabel = transform
+    src = _transpose(board) if transposed else board
+    return [[relabel[src[i][j]] for j in col_order] for i in row_order]
+
+
+def from_canonical(canonical_board, transform):
+    """Map a board in canonical orientation/labeling back to the caller's."""
+    transposed, row_order, col_order, relabel = transform
+    original = {label: value for value, label in relabel.items()}
+    src = [[0] * 9 for _ in range(9)]
+    for r, i in enumerate(row_order):
+        for c, j in enumerate(col_order):
+            src[i][j] = original[canonical_board[r][c]]
+    return _transpose(src) if transposed else src
+
+
+class LRUCache:
+    """Thread-safe LRU cache with a maximum size and a per-entry time to live."""
+
+    def __init__(self, max_size=DEFAULT_SIZE, ttl=DEFAULT_TTL):
+        self.max_size = max_size
+        self.ttl = ttl
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            expires_at, value = entry
+            if expires_at < time.monotonic():
+                del self._entries[key]
+                self.expirations += 1
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def put(self, key, value):
+        with self._lock:
+            self._entries[key] = (time.monotonic() + self.ttl, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self):
+        with self._lock:
+            return {
+                "size": len(self._entries),
+                "max_size": self.max_size,
+                "ttl_seconds": self.ttl,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "expirations": self.expirations,
+            }
+
+
+solution_cache = LRUCache()
+
+
+def get_solution(board, solve, variant=()):
+    """Solution of board via the cache; solve(board) is called on a miss.
+
+    variant names the engine (and strategy) behind solve: a board with
+    several solutions may be solved differently by each, so they do not
+    share entries. Returns (solution or None, hit).
+    """
+    key, transform = canonical_form(board)
+    cached = solution_cache.get(("solution", variant, key))
+    if cached is not None:
+        solution = cached["solution"]
+        return (from_canonical(solution, transform) if solution else None), True
+
+    solution = solve(board)
+    solution_cache.put(("solution", variant, key), {
+        "solution": to_canonical(solution, transform) if solution else None
+    })
+    return solution, False
+
+
+def get_analysis(board, analyze, variant=()):
+    """Cached result of analyze(board) for results invariant under symmetry.
+
+    A "solution" entry in the result is the one exception: it is stored in
+    canonical orientation and mapped back onto each board that hits it.
+    variant distinguishes analyses run with different parameters.
+    Returns (result, hit).
+    """
+    key, transform = canonical_form(board)
+    cached = solution_cache.get(("analysis", variant, key))
+    if cached is not None:
+        if cached.get("solution"):
+            cached = {**cached, "solution": from_canonical(cached["solution"], transform)}
+        return cached, True
+
+    result = analyze(board)
+    stored = result
+    if result.get("solution"):
+        stored = {**result, "solution": to_canonical(result["solution"], transform)}
+    solution_cache.put(("analysis", variant, key), stored)
+    return result, False
@@ -0,0 +1,53 @@
+"""Puzzle corpus for benchmarks, as 81-character strings (0 for empty cells).
+
+Every puzzle in easy, hard and seventeen has exactly one solution; every
+puzzle in unsolvable is free of duplicates but has no solution.
+"""
+
+CORPUS = {
+    "easy": [
+        "100700050007850104005003007071300005048075000350109000000030080030000601014962573",
+        "085000004000105298600400000400908026000570483008600070509201000040090350007004962",
+        "002008634000400120463027080006210895825069400001380760017090048004002050000800000",
+        "025791340000000900830002705000826091902500000501030624310200459450170283200053170",
+        "736108504251064783080735126097080400304059801508400009972000610145800207860010000",
+        "530070000600195000098000060800060003400803001700020006060000280000419005000080079",
+    ],
+    "hard": [
+        "800000000003600000070090200050007000000045700000100030001000068008500010090000400",
+        "000000039000001005003050800008090006070002000100400000009080050020000600400700000",
+        "100000002090400050006000700050903000000070000000850040700000600030009080002000001",
+        "000000012000000003002300400001800005060070800000009000008500000900040500470006000",
+        "600008940900006100070040000200610000000000200089002000000060005000000030800001600",
+    ],
+    "seventeen": [
+        "000000010400000000020000000000050407008000300001090000300400200050100000000806000",
+        "000000010400000000020000000000050604008000300001090000300400200050100000000807000",
+        "000000012000035000000600070700000300000400800100000000000120000080000040050000600",
+        "000000012003600000000007000410020000000500300700000600280000040000300500000000000",
+        "000000012008030000000000040120500000000004700060000000507000300000620000000100000",
+        "000000013000030080070000000000206000030000900000010000600500204000400700100000000",
+        "000000013000200000000000080000760200008000400010000000200000750600340000000008000",
+        "000000013000500070000802000000400900107000000000000200890000050040000600000010000",
+        "400000805030000000000700000020000060000080400000010000000603070500200000104000000",
+        "520006000000000701300000000000400800600000050000000000041800000000030020008700000",
+    ],
+    "unsolvable": [
+        "012345678000000000000000000000000000900000000000000000000000000000000000000000000",
+        "800000000003600000070090200350007000000045700000100030001000068008500010090000400",
+        "100700050007850104005003007071300005048075060350109000000030080030000601014962573",
+        "000000012000035000000600070700000300000400800100000000000120000081000040050000600",
+        "025791340000600900830002705000826091902500000501030624310200459450170283200053170",
+    ],
+}
+
+
+def parse(line):
+    """81-character string to a 9x9 list of lists."""
+    return [[int(line[i * 9 + j]) for j in range(9)] for i in range(9)]
+
+
+def load(categories=None):
+    """Return {category: [board, ...]} for the requested categories."""
+    categories = categories or list(CORPUS)
+    return {category: [parse(line) for line in CORPUS[category]] for category in categories}
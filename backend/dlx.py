@@ -0,0 +1,247 @@
+"""Dancing Links (Algorithm X) exact-cover solver.
+
+Sudoku maps to an exact-cover matrix with 729 rows (one per cell/digit
+candidate) and 324 columns (cell, row-digit, column-digit and box-digit
+constraints). The full matrix is built once at import; each solve copies the
+link arrays, covers the columns of the given clues and searches from there.
+"""
+
+ROOT = 0
+NUM_COLUMNS = 324
+
+
+def _candidate_columns(idx, num):
+    row, col = divmod(idx, 9)
+    box = (row // 3) * 3 + col // 3
+    d = num - 1
+    return (1 + idx, 82 + row * 9 + d, 163 + col * 9 + d, 244 + box * 9 + d)
+
+
+def _build_template():
+    # Node 0 is the root, nodes 1..324 are column headers.
+    size = 1 + NUM_COLUMNS + 729 * 4
+    L = list(range(size))
+    R = list(range(size))
+    U = list(range(size))
+    D = list(range(size))
+    C = [0] * size
+    S = [0] * (1 + NUM_COLUMNS)
+    ROW = [-1] * size
+
+    for c in range(NUM_COLUMNS + 1):
+        L[c] = c - 1 if c > 0 else NUM_COLUMNS
+        R[c] = c + 1 if c < NUM_COLUMNS else 0
+        C[c] = c
+
+    # First node of each candidate row, indexed by idx * 9 + (num - 1).
+    first = [0] * 729
+    node = NUM_COLUMNS + 1
+    for idx in range(81):
+        for num in range(1, 10):
+            start = node
+            first[idx * 9 + num - 1] = start
+            for col in _candidate_columns(idx, num):
+                C[node] = col
+                ROW[node] = idx * 9 + num - 1
+                U[node] = U[col]
+                D[node] = col
+                D[U[col]] = node
+                U[col] = node
+                S[col] += 1
+                L[node] = node - 1
+                R[node] = node + 1
+                node += 1
+            L[start] = node - 1
+            R[node - 1] = start
+
+    return L, R, U, D, C, S, ROW, first
+
+
+_L, _R, _U, _D, _C, _S, _ROW, _FIRST = _build_template()
+
+
+class _Matrix:
+    __slots__ = ("L", "R", "U", "D", "S")
+
+    def __init__(self):
+        self.L = _L[:]
+        self.R = _R[:]
+        self.U = _U[:]
+        self.D = _D[:]
+        self.S = _S[:]
+
+    def cover(self, c):
+        L, R, U, D, S = self.L, self.R, self.U, self.D, self.S
+        R[L[c]] = R[c]
+        L[R[c]] = L[c]
+        i = D[c]
+        while i != c:
+            j = R[i]
+            while j != i:
+                U[D[j]] = U[j]
+                D[U[j]] = D[j]
+                S[_C[j]] -= 1
+                j = R[j]
+            i = D[i]
+
+    def uncover(self, c):
+        L, R, U, D, S = self.L, self.R, self.U, self.D, self.S
+        i = U[c]
+        while i != c:
+            j = L[i]
+            while j != i:
+                S[_C[j]] += 1
+                U[D[j]] = j
+                D[U[j]] = j
+                j = L[j]
+            i = U[i]
+        R[L[c]] = c
+        L[R[c]] = c
+
+    def select(self, node):
+        """Cover every other column of the row containing node."""
+        R = self.R
+        j = R[node]
+        while j != node:
+            self.cover(_C[j])
+            j = R[j]
+
+    def deselect(self, node):
+        L = self.L
+        j = L[node]
+        while j != node:
+            self.uncover(_C[j])
+            j = L[j]
+
+
+def _load(board):
+    """Build a matrix with the board's clues already placed, or None on a clash."""
+    matrix = _Matrix()
+    R = matrix.R
+    covered = set()
+    for i in range(9):
+        for j in range(9):
+            num = board[i][j]
+            if num == 0:
+                continue
+            node = _FIRST[(i * 9 + j) * 9 + num - 1]
+            cols = [_C[node], _C[R[node]], _C[R[R[node]]], _C[R[R[R[node]]]]]
+            if covered.intersection(cols):
+                return None
+            covered.update(cols)
+            matrix.cover(cols[0])
+            matrix.select(node)
+    return matrix
+
+
+def _solutions(matrix, stats=None):
+    """Algorithm X as a generator, yielding the selected nodes at every solution.
+
+    Iterative: columns and nodes hold the covered column and the selected
+    node of each depth. The yielded list is live; it changes once the
+    generator is resumed.
+    """
+    R, D, S = matrix.R, matrix.D, matrix.S
+    columns = []
+    nodes = []
+    # Solutions found when the node at each depth was selected (for backtracks)
+    found_at = []
+    found = 0
+
+    while True:
+        best = ROOT
+        if R[ROOT] == ROOT:
+            found += 1
+            yield nodes
+        else:
+            # Choose the column with the fewest remaining rows.
+            best = R[ROOT]
+            best_size = S[best]
+            c = R[best]
+            while c != ROOT and best_size > 1:
+                if S[c] < best_size:
+                    best = c
+                    best_size = S[c]
+                c = R[c]
+            if best_size == 0:
+                best = ROOT
+
+        if best != ROOT:
+            matrix.cover(best)
+            r = D[best]
+            columns.append(best)
+            nodes.append(r)
+            found_at.append(found)
+            matrix.select(r)
+            if stats is not None:
+                stats.nodes += 1
+                if stats.nodes >= stats.next_check:
+                    stats.check_budget()
+                stats.max_depth = max(stats.max_depth, len(nodes))
+            continue
+
+        # Move the deepest choice on to its next row, backing out of
+        # columns whose rows are exhausted.
+        while columns:
+            c = columns[-1]
+            r = nodes[-1]
+            matrix.deselect(r)
+            if stats is not None and found == found_at[-1]:
+                stats.backtracks += 1
+            r = D[r]
+            if r != c:
+                nodes[-1] = r
+                found_at[-1] = found
+                matrix.select(r)
+                if stats is not None:
+                    stats.nodes += 1
+                    if stats.nodes >= stats.next_check:
+                        stats.check_budget()
+                break
+            matrix.uncover(c)
+            columns.pop()
+            nodes.pop()
+            found_at.pop()
+        else:
+            return
+
+
+def _to_board(board, rows):
+    solution = [list(row) for row in board]
+    for candidate in rows:
+        idx, d = divmod(candidate, 9)
+        solution[idx // 9][idx % 9] = d + 1
+    return solution
+
+
+def iter_solutions(board, stats=None):
+    """Yield every solution of board as a new 9x9 list, lazily."""
+    matrix = _load(board)
+    if matrix is None:
+        return
+    for nodes in _solutions(matrix, stats):
+        yield _to_board(board, [_ROW[node] for node in nodes])
+
+
+def get_solution(board, stats=None):
+    """Return a solved copy of board, or None if it has no solution."""
+    for solution in iter_solutions(board, stats):
+        return solution
+    return None
+
+
+def solvable(board, stats=None):
+    return get_solution(board, stats) is not None
+
+
+def get_number_of_solutions(board, max_solutions=2, stats=None):
+    """Count solutions, stopping early once max_solutions have been found."""
+    matrix = _load(board)
+    if matrix is None:
+        return 0
+    count = 0
+    for _ in _solutions(matrix, stats):
+        count += 1
+        if count >= max_solutions:
+            break
+    return count
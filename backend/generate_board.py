@@ -1,6 +1,9 @@
 import random
-import copy
-from backtracking import is_safe, get_number_of_solutions, get_possible_values, fill_board
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from backtracking import fill_board, count_solutions
+from board_state import BoardState, FULL, PEERS, BOX_OF
 
 EASY = 60
 MEDIUM = 40
@@ -11,33 +14,127 @@ def generate_random_board():
 	fill_board(board)
 	return board
 
-def generate_puzzle(difficulty):
+def _unavoidable_rectangles(board):
+	"""Map each cell to the deadly rectangles of a solved board that contain it.
+
+	Four cells on two rows, two columns and two boxes holding a b / b a can
+	swap their values, so a puzzle with all four cells empty is never unique.
+	"""
+	rectangles = [[] for _ in range(81)]
+	for r1 in range(9):
+		for r2 in range(r1 + 1, 9):
+			for c1 in range(9):
+				for c2 in range(c1 + 1, 9):
+					a, b = board[r1][c1], board[r1][c2]
+					if board[r2][c1] != b or board[r2][c2] != a:
+						continue
+					cells = (r1 * 9 + c1, r1 * 9 + c2, r2 * 9 + c1, r2 * 9 + c2)
+					if len({BOX_OF[idx] for idx in cells}) != 2:
+						continue
+					for idx in cells:
+						rectangles[idx].append(cells)
+	return rectangles
+
+def _removal_shortcut(state, idx, rectangles, digit_counts):
+	"""Decide a removal without searching when possible.
+
+	Returns False if removing idx obviously breaks uniqueness, True if it
+	obviously keeps it, and None if a uniqueness check is needed.
+	"""
+	value = state.cells[idx]
+	# Two digits missing from the puzzle can be swapped in any solution
+	if digit_counts[value] == 1 and 0 in digit_counts[1:]:
+		return False
+	for cells in rectangles[idx]:
+		if all(state.cells[other] == 0 for other in cells if other != idx):
+			return False
+	# Every other digit is seen by the cell's peers: it stays a naked single
+	seen = 0
+	for other in PEERS[idx]:
+		if state.cells[other]:
+			seen |= 1 << (state.cells[other] - 1)
+	if seen | (1 << (value - 1)) == FULL:
+		return True
+	return None
+
+def _unique_without(board, idx):
+	board = [row[:] for row in board]
+	board[idx // 9][idx % 9] = 0
+	return count_solutions(BoardState(board), 2) == 1
+
+def generate_puzzle(difficulty, time_budget=None, workers=1):
+	"""Remove clues from a random solved board while the solution stays unique.
+
+	Stops at `difficulty` filled cells, or when `time_budget` seconds have
+	passed, returning the sparsest unique puzzle reached so far. With more
+	than one worker, uniqueness checks for the next candidates run in
+	parallel.
+	"""
+	deadline = time.perf_counter() + time_budget if time_budget is not None else None
 	complete_board = generate_random_board()
-	result_board = copy.deepcopy(complete_board)
+	state = BoardState(complete_board)
+	rectangles = _unavoidable_rectangles(complete_board)
+	digit_counts = [0] + [9] * 9
+	filled = 81
 	
-	cells = [(i, j) for i in range(9) for j in range(9)]
+	cells = list(range(81))
 	random.shuffle(cells)
-	
-	cells_to_remove = 81 - difficulty
-	removed = 0
-	cell_index = 0
-	
-	while cell_index < len(cells) and removed < cells_to_remove:
-		i, j = cells[cell_index]
-		cell_index += 1
-		
-		result_board[i][j] = 0
-		
-		board_copy = copy.deepcopy(result_board)
-		num_solutions = get_number_of_solutions(board_copy, 0, 0, 2)
-		
-		if num_solutions == 1:
-			removed += 1
-		else:
-			result_board[i][j] = complete_board[i][j]
-	
-	return result_board
+	pending = deque(cells)
+
+	def remove(idx):
+		nonlocal filled
+		digit_counts[state.cells[idx]] -= 1
+		state.unassign(idx)
+		filled -= 1
+
+	pool = ProcessPoolExecutor(max_workers=workers) if workers > 1 else None
+	try:
+		while pending and filled > difficulty:
+			if deadline is not None and time.perf_counter() > deadline:
+				break
 
+			# Candidates whose removal still needs a uniqueness check
+			batch = []
+			while pending and len(batch) < workers and filled > difficulty:
+				idx = pending.popleft()
+				shortcut = _removal_shortcut(state, idx, rectangles, digit_counts)
+				if shortcut is True:
+					remove(idx)
+				elif shortcut is None:
+					batch.append(idx)
+			if not batch or filled <= difficulty:
+				continue
+
+			if pool is None:
+				idx = batch[0]
+				value = state.cells[idx]
+				state.unassign(idx)
+				unique = count_solutions(state, 2) == 1
+				state.assign(idx, value)
+				if unique:
+					remove(idx)
+				continue
+
+			board = state.to_board()
+			results = list(pool.map(_unique_without, [board] * len(batch), batch))
+			recheck = []
+			accepted = False
+			for idx, unique in zip(batch, results):
+				# A removal that breaks uniqueness keeps breaking it once more
+				# clues are gone, so failed candidates are dropped for good.
+				if not unique:
+					continue
+				if not accepted:
+					remove(idx)
+					accepted = True
+				else:
+					recheck.append(idx)
+			pending.extendleft(reversed(recheck))
+	finally:
+		if pool is not None:
+			pool.shutdown()
+	
+	return state.to_board()
 
 if __name__ == '__main__':
 	board = generate_puzzle(HARD)
@@ -0,0 +1,137 @@
+"""Grade puzzles by the effort needed to solve them rather than by clue count.
+
+A puzzle is first run through propagation with increasingly strong rule sets
+(the technique ladder). The first set that solves it without guessing gives
+the base score; a puzzle that needs search on top of every rule is scored by
+how much branching it took.
+"""
+
+import math
+import time
+
+from arc import ArcState, RULES
+from board_state import MASK_DIGITS
+from generate_board import generate_puzzle
+from solver import _find_best_cell
+from solver_trace import VerboseTrace
+
+# (name, rules, base score), from weakest to strongest
+TECHNIQUES = [
+    ("naked_singles", (), 1.0),
+    ("hidden_singles", ("hidden_single",), 1.5),
+    ("intersections", ("hidden_single", "pointing", "box_line"), 2.5),
+    ("pairs", ("hidden_single", "pointing", "box_line", "naked_pair", "hidden_pair"), 3.5),
+    ("triples", tuple(RULES), 4.5),
+]
+SEARCH_SCORE = 5.0
+MAX_SCORE = 10.0
+
+# Score bands for the named difficulties
+BANDS = {
+    "easy": (0.0, 1.5),
+    "medium": (1.5, 3.0),
+    "hard": (3.0, MAX_SCORE),
+}
+
+
+def _propagate(board, rules):
+    """Return (state, ok, rule firing counts) after propagation with rules."""
+    steps = VerboseTrace()
+    state = ArcState(board, steps, rules)
+    ok = state.propagate(state.assigned_cells())
+    fired = {}
+    for step in steps:
+        rule = step.get("rule")
+        if rule:
+            fired[rule] = fired.get(rule, 0) + 1
+    return state, ok, fired
+
+
+def _search(state, depth, counters):
+    counters["max_depth"] = max(counters["max_depth"], depth)
+    idx = _find_best_cell(state)
+    if idx is None:
+        return True
+
+    for num in MASK_DIGITS[state.domains[idx]]:
+        counters["branches"] += 1
+        mark = state.mark()
+        if state.assign(idx, num) and state.propagate([idx]) and _search(state, depth + 1, counters):
+            return True
+        state.undo(mark)
+    return False
+
+
+def grade_propagation(board, max_level=len(TECHNIQUES) - 1):
+    """Grade using the technique ladder only, up to TECHNIQUES[max_level].
+
+    Returns a grade dict, or None if those techniques do not solve the board.
+    """
+    for name, rules, base in TECHNIQUES[:max_level + 1]:
+        state, ok, fired = _propagate(board, rules)
+        if not ok:
+            return {"score": 0.0, "solvable": False, "technique": name, "techniques_used": fired,
+                    "branches": 0, "max_depth": 0}
+        if all(state.values):
+            # Harder puzzles within a level need the level's rules more often
+            extra = min(0.9, sum(fired.values()) / 100)
+            return {"score": base + extra if rules else base, "solvable": True, "technique": name,
+                    "techniques_used": fired, "branches": 0, "max_depth": 0}
+    return None
+
+
+def grade(board):
+    """Return a grade dict with a numeric "score" between 0 and MAX_SCORE."""
+    result = grade_propagation(board)
+    if result is not None:
+        return result
+
+    state, ok, fired = _propagate(board, TECHNIQUES[-1][1])
+    # Only rule firings before the search count towards techniques_used
+    state.trace = state.removals = None
+    counters = {"branches": 0, "max_depth": 0}
+    solvable = _search(state, 0, counters)
+    score = min(MAX_SCORE, SEARCH_SCORE + math.log2(1 + counters["branches"]) / 2)
+    return {"score": score if solvable else 0.0, "solvable": solvable, "technique": "search",
+            "techniques_used": fired, **counters}
+
+
+def _filled_cells_for(min_score):
+    # Harder bands need sparser puzzles; the generator stops at the sparsest
+    # unique puzzle it can reach when the target is out of range.
+    if min_score >= TECHNIQUES[2][2]:
+        return 17
+    if min_score >= TECHNIQUES[1][2]:
+        return 26
+    return 36
+
+
+def generate_graded(min_score, max_score, time_budget=5.0):
+    """Generate puzzles until one grades within [min_score, max_score].
+
+    Returns (board, grade, in_band). When the time budget runs out the
+    candidate closest to the band is returned with in_band False.
+    """
+    deadline = time.perf_counter() + time_budget
+    filled_cells = _filled_cells_for(min_score)
+    best = None
+
+    while True:
+        board = generate_puzzle(filled_cells, max(0.0, deadline - time.perf_counter()))
+
+        # Cheap rejection: a puzzle that falls to techniques below the band
+        # is rejected without trying the stronger rules or search.
+        below = [level for level, (name, rules, base) in enumerate(TECHNIQUES) if base + 0.9 < min_score]
+        result = grade_propagation(board, below[-1]) if below else None
+        if result is None:
+            result = grade(board)
+
+        score = result["score"]
+        if min_score <= score <= max_score:
+            return board, result, True
+
+        distance = min_score - score if score < min_score else score - max_score
+        if best is None or distance < best[0]:
+            best = (distance, board, result)
+        if time.perf_counter() >= deadline:
+            return best[1], best[2], False
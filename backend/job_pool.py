@@ -0,0 +1,108 @@
+"""A process pool whose running tasks can be signalled by the parent.
+
+Every job (a group of tasks submitted together) owns a slot in a shared
+array of flags, handed to the workers when they start. Tasks read their
+job's flag with job_flag(slot), typically through the cancel hook of a
+SearchStats, so signalling costs no messages and no process restarts.
+"""
+
+import multiprocessing
+import threading
+from concurrent.futures import ProcessPoolExecutor
+
+# Job flag values
+RUN = 0
+STOP = 1
+SPLIT = 2
+
+# Jobs that can be in flight at once (one flag each)
+MAX_JOBS = 256
+
+_flags = None
+
+
+def _init_worker(flags):
+    global _flags
+    _flags = flags
+
+
+def job_flag(slot):
+    """Current flag of a job, read from inside a worker."""
+    return _flags[slot]
+
+
+class Job:
+    """Tasks sharing one flag; the slot is reused once finish() was called and they all ended."""
+
+    def __init__(self, pool, slot):
+        self.pool = pool
+        self.slot = slot
+        self._running = 0
+        self._finished = False
+
+    def submit(self, fn, *args):
+        """Run fn(slot, *args) in a worker; returns its future."""
+        future = self.pool._executor().submit(fn, self.slot, *args)
+        with self.pool._lock:
+            self._running += 1
+        future.add_done_callback(self._task_done)
+        return future
+
+    def signal(self, value):
+        self.pool._flags[self.slot] = value
+
+    def finish(self):
+        """Tell the remaining tasks to stop; the slot is released when the last one returns."""
+        self.signal(STOP)
+        with self.pool._lock:
+            self._finished = True
+            release = self._running == 0
+        if release:
+            self.pool._release(self.slot)
+
+    def _task_done(self, future):
+        with self.pool._lock:
+            self._running -= 1
+            release = self._finished and self._running == 0
+        if release:
+            self.pool._release(self.slot)
+
+
+class JobPool:
+    """A lazily started ProcessPoolExecutor plus the flags of the jobs running on it."""
+
+    def __init__(self, workers):
+        self.workers = workers
+        self._flags = multiprocessing.RawArray("b", MAX_JOBS)
+        self._free = list(range(MAX_JOBS))
+        self._lock = threading.Lock()
+        self._pool = None
+
+    def _executor(self):
+        with self._lock:
+            if self._pool is None:
+                self._pool = ProcessPoolExecutor(self.workers, initializer=_init_worker, initargs=(self._flags,))
+            return self._pool
+
+    def start_job(self):
+        with self._lock:
+            if not self._free:
+                raise RuntimeError("too many jobs in flight")
+            slot = self._free.pop()
+        self._flags[slot] = RUN
+        return Job(self, slot)
+
+    def _release(self, slot):
+        with self._lock:
+            self._free.append(slot)
+
+    def idle(self):
+        """True if no job holds a slot."""
+        with self._lock:
+            return len(self._free) == MAX_JOBS
+
+    def close(self):
+        with self._lock:
+            pool, self._pool = self._pool, None
+        if pool is not None:
+            pool.shutdown(cancel_futures=True)
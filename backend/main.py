@@ -1,20 +1,176 @@
 
-from flask import Flask, request, jsonify
+from flask import Flask, Response, g, request, jsonify
 from flask_cors import CORS
 import time
+import base64
 import copy
+import json
+import os
 
+import arc
 import backtracking
+import batch
+import board_format
+import bulk
+import cache
+import grading
+import parallel
+import portfolio
+import dlx
 import solver
+import solver_trace
+from metrics import metrics
+from stats import BudgetExceeded, SearchStats
+from session_store import session_store
+from trace_store import trace_store
 from validation import validate_board, is_board_valid
 from generate_board import generate_puzzle, EASY, MEDIUM, HARD
+from puzzle_pool import puzzle_pool
 
 app = Flask(__name__)
 CORS(app, resources={r"/*": {"origins": "*"}})
 
+# Upper bounds of the per-request search budget; requests may ask for less
+MAX_TIME_LIMIT_MS = float(os.environ.get('SUDOKU_MAX_TIME_LIMIT_MS', 10000))
+MAX_NODES = int(os.environ.get('SUDOKU_MAX_NODES', 50000000))
+# Most solutions a single /api/solutions request may stream
+MAX_SOLUTIONS_LIMIT = int(os.environ.get('SUDOKU_MAX_SOLUTIONS', 100000))
+# Processes checking clue removals in parallel for puzzles generated on request
+GENERATE_WORKERS = int(os.environ.get('SUDOKU_GENERATE_WORKERS', 1))
+
+# solver name -> generator of solution boards
+SOLUTION_ENGINES = {
+	'backtracking': backtracking.iter_solutions,
+	'arc-backtracking': solver.iter_solutions,
+	'dlx': dlx.iter_solutions,
+}
+
+# Board forms a response can use; see request_data()
+BOARD_FORMATS = ('list', 'string', 'packed')
+# Bodies holding only boards, in the forms of board_format
+COMPACT_MIMETYPES = {'text/plain': 'string', 'application/octet-stream': 'packed'}
+
+def query_value(value):
+	"""A query string value as JSON if it parses as such ("5", "true"), else as the string."""
+	try:
+		return json.loads(value)
+	except ValueError:
+		return value
+
+def request_data():
+	"""The request payload as a dict, whatever the body format, or None if unreadable.
+
+	JSON bodies are used as they are, except that boards given as 81-character
+	strings become 9x9 lists. A text/plain body (one 81-character puzzle per
+	line) or an application/octet-stream body (packed 41-byte records) becomes
+	"boards", with the first one also as "board"; the other fields then come
+	from the query string. Malformed boards are left as None, which
+	validate_board rejects.
+
+	Boards in the response take the form the request used (g.board_format),
+	unless "format" asks for one of BOARD_FORMATS. Requests without a body
+	can ask for it with ?format=.
+	"""
+	if 'data' in g:
+		return g.data
+
+	form = 'list'
+	body = request.get_data()
+	# JSON sent as text/plain (as fetch does by default) is still read as JSON
+	if request.mimetype in COMPACT_MIMETYPES and not body.lstrip().startswith(b'{'):
+		form = COMPACT_MIMETYPES[request.mimetype]
+		data = {key: query_value(value) for key, value in request.args.items()}
+		if form == 'string':
+			boards = board_format.parse_lines(body)
+		else:
+			try:
+				boards = board_format.parse_packed(body)
+			except ValueError:
+				boards = [None]
+		data['boards'] = boards
+		if boards:
+			data['board'] = boards[0]
+	else:
+		data = request.get_json(force=True, silent=True)
+		if isinstance(data, dict):
+			if isinstance(data.get('board'), str):
+				data['board'] = board_format.from_string(data['board'])
+				form = 'string'
+			if isinstance(data.get('boards'), list) and any(isinstance(board, str) for board in data['boards']):
+				data['boards'] = [board_format.from_string(board) if isinstance(board, str) else board
+					for board in data['boards']]
+				form = 'string'
+
+	if isinstance(data, dict) and data.get('format') in BOARD_FORMATS:
+		form = data['format']
+	g.board_format = form
+	g.data = data
+	return data
+
+def board_encoder():
+	"""Function putting a board in the response form of this request (None stays None).
+
+	Taken before streaming, as the generator runs outside the request context.
+	"""
+	form = g.get('board_format') or request.args.get('format', 'list')
+	if form == 'string':
+		return lambda board: None if board is None else board_format.to_string(board)
+	if form == 'packed':
+		return lambda board: None if board is None else base64.b64encode(board_format.pack(board)).decode('ascii')
+	return lambda board: board
+
+def board_out(board):
+	return board_encoder()(board)
+
+def solutions_response(response, solutions):
+	"""jsonify(response), or only the solutions when Accept prefers text/plain or application/octet-stream.
+
+	Raw solutions are 81-character lines or packed records in input order,
+	with an empty board (all zeros) for every board left unsolved.
+	"""
+	best = request.accept_mimetypes.best_match(['application/json', *COMPACT_MIMETYPES])
+	if best not in COMPACT_MIMETYPES:
+		return jsonify(response)
+	solutions = [solution or [[0] * 9 for _ in range(9)] for solution in solutions]
+	if best == 'text/plain':
+		return Response(''.join(board_format.to_string(solution) + '\n' for solution in solutions), mimetype=best)
+	return Response(b''.join(board_format.pack(solution) for solution in solutions), mimetype=best)
+
+def valid_rules(rules):
+	"""True if rules is a list of rule names from arc.RULES; non-string items are rejected before the lookup."""
+	return isinstance(rules, (list, tuple)) and all(isinstance(rule, str) and rule in arc.RULES for rule in rules)
+
+def wants_stats(data):
+	"""True if the request asked for the search "stats" block (body field or ?stats=1)."""
+	return bool(data.get('stats')) or request.args.get('stats', '').lower() in ('1', 'true')
+
+def parse_budget(data):
+	"""Search budget from "time_limit_ms" and "max_nodes"; returns ((seconds, nodes), error response)."""
+	time_limit = data.get('time_limit_ms', MAX_TIME_LIMIT_MS)
+	if not isinstance(time_limit, (int, float)) or time_limit <= 0:
+		return None, (jsonify({'error': '"time_limit_ms" must be a positive number'}), 400)
+
+	max_nodes = data.get('max_nodes', MAX_NODES)
+	if not isinstance(max_nodes, int) or max_nodes < 1:
+		return None, (jsonify({'error': '"max_nodes" must be a positive integer'}), 400)
+
+	return (min(time_limit, MAX_TIME_LIMIT_MS) / 1000, min(max_nodes, MAX_NODES)), None
+
+def budget_exceeded(exc, solver_name, board, start):
+	"""Error response for a search that ran out of budget: 408 for time, 422 for nodes."""
+	time_taken = (time.perf_counter() - start) * 1000
+	stats = exc.stats.to_dict(time_taken)
+	metrics.observe(request.path, solver_name, time_taken, stats, board, budget_exceeded=True)
+	return jsonify({
+		'error': 'Search ' + ('time limit' if exc.reason == 'time' else 'node budget') + ' exceeded',
+		'budget_exceeded': exc.reason,
+		'stats': stats,
+		'time_taken_ms': time_taken
+	}), 408 if exc.reason == 'time' else 422
+
 @app.route('/api/validate', methods=['POST'])
 def api_validate():
-	data = request.get_json(force=True, silent=True)
+	data = request_data()
 	if not data or 'board' not in data:
 		return jsonify({'error': 'Missing "board" in JSON payload'}), 400
 
@@ -31,9 +187,32 @@ def api_validate():
 	})
 
 
+@app.route('/api/validate/batch', methods=['POST'])
+def api_validate_batch():
+	"""Check many boards at once: validity, duplicate cells and, optionally, candidate masks."""
+	data = request_data()
+	if not data or 'boards' not in data or not isinstance(data['boards'], list):
+		return jsonify({'error': 'Missing "boards" list in JSON payload'}), 400
+
+	boards = data['boards']
+	index = first_malformed_board(boards)
+	if index is not None:
+		return jsonify({'error': f'Invalid board format at index {index}. Must be 9x9 array of integers 0-9.'}), 400
+
+	start = time.perf_counter()
+	results = bulk.to_dicts(bulk.validate(boards, candidates=bool(data.get('candidates')))) if boards else []
+	time_taken = (time.perf_counter() - start) * 1000
+
+	return jsonify({
+		'results': results,
+		'valid': sum(result['valid'] for result in results),
+		'time_taken_ms': time_taken
+	})
+
+
 @app.route('/api/solvable', methods=['POST'])
 def api_solvable():
-	data = request.get_json(force=True, silent=True)
+	data = request_data()
 	if not data or 'board' not in data:
 		return jsonify({'error': 'Missing "board" in JSON payload'}), 400
 
@@ -44,33 +223,52 @@ def api_solvable():
 	if not is_board_valid(board):
 		return jsonify({'error': 'Invalid board: duplicate values found in row, column, or box.'}), 400
 
-	time_to_check_solvable = 0
-	time_to_get_solutions = 0
-	solvable = False
-	count_solutions = 0
+	max_solutions = data.get('max_solutions', 2)
+	if not isinstance(max_solutions, int) or max_solutions < 1 or max_solutions > MAX_SOLUTIONS_LIMIT:
+		return jsonify({'error': f'"max_solutions" must be between 1 and {MAX_SOLUTIONS_LIMIT}'}), 400
+
+	budget, error = parse_budget(data)
+	if error:
+		return error
+
+	# "parallel" splits the search over the worker processes of parallel.py
+	engine = parallel if data.get('parallel') else backtracking
+
+	def analyze(board):
+		# Solvability, count and first solution come from a single search
+		stats = SearchStats(*budget)
+		analysis = engine.analyze(board, max_solutions, stats)
+		time_to_check_solvable = analysis['time_to_first_ms']
+
+		return {
+			'solvable': analysis['solvable'],
+			'number_of_solutions': analysis['number_of_solutions'],
+			'solution': analysis['solution'],
+			'time_to_check_solvable': time_to_check_solvable,
+			'time_to_get_solutions': analysis['time_taken_ms'] - time_to_check_solvable,
+			'stats': stats.to_dict(analysis['time_taken_ms']),
+		}
 
 	start = time.perf_counter()
-	solvable = backtracking.solvable(copy.deepcopy(board))
-	end = time.perf_counter()
-	time_to_check_solvable = (end - start) * 1000
-	
-	if solvable:
-		start = time.perf_counter()
-		count_solutions = backtracking.get_number_of_solutions(copy.deepcopy(board))
-		end = time.perf_counter()
-		time_to_get_solutions = (end - start) * 1000
+	try:
+		if data.get('cache', True):
+			result, cached = cache.get_analysis(board, analyze, max_solutions)
+		else:
+			result, cached = analyze(board), False
+	except BudgetExceeded as exc:
+		return budget_exceeded(exc, 'backtracking', board, start)
+	time_taken = (time.perf_counter() - start) * 1000
+	metrics.observe(request.path, 'backtracking', time_taken, result['stats'], board, cached)
 
-	return jsonify({
-		'solvable': bool(solvable),
-		'number_of_solutions': count_solutions,
-		'time_to_check_solvable': time_to_check_solvable,
-		'time_to_get_solutions': time_to_get_solutions,
-	})
+	response = {**result, 'solution': board_out(result['solution']), 'cached': cached}
+	if not wants_stats(data):
+		del response['stats']
+	return solutions_response(response, [result['solution']])
 
 
 @app.route('/api/solve/backtracking', methods=['POST'])
 def api_solve():
-	data = request.get_json(force=True, silent=True)
+	data = request_data()
 	if not data or 'board' not in data:
 		return jsonify({'error': 'Missing "board" in JSON payload'}), 400
 
@@ -78,22 +276,48 @@ def api_solve():
 	if not validate_board(board):
 		return jsonify({'error': 'Invalid board format. Must be 9x9 array of integers 0-9.'}), 400
 
-	board_copy = copy.deepcopy(board)
-	
+	strategy = data.get('strategy', 'naive')
+	if not isinstance(strategy, str) or strategy not in backtracking.STRATEGIES:
+		return jsonify({'error': 'Invalid "strategy". Choose from: ' + ', '.join(backtracking.STRATEGIES)}), 400
+
+	budget, error = parse_budget(data)
+	if error:
+		return error
+
+	stats = SearchStats(*budget)
+
+	def solve(board):
+		solution, nodes = backtracking.get_solution_with_stats(copy.deepcopy(board), strategy, stats)
+		return solution
+
 	start = time.perf_counter()
-	solution = backtracking.get_solution(board_copy)
+	try:
+		if data.get('cache', True):
+			solution, cached = cache.get_solution(board, solve, ('backtracking', strategy))
+		else:
+			solution, cached = solve(board), False
+	except BudgetExceeded as exc:
+		return budget_exceeded(exc, strategy, board, start)
 	end = time.perf_counter()
 	time_taken = (end - start) * 1000
-	print(time_taken)
-	return jsonify({
-		'solution': solution,
+	stats_block = None if cached else stats.to_dict(time_taken)
+	metrics.observe(request.path, strategy, time_taken, stats_block, board, cached)
+
+	response = {
+		'solution': board_out(solution),
+		'strategy': strategy,
+		'nodes': stats.nodes,
+		'cached': cached,
 		'time_taken_ms': time_taken
-	})
+	}
+	if wants_stats(data):
+		response['stats'] = stats_block
+	return solutions_response(response, [solution])
 
 
 @app.route('/api/solve/arc-backtracking', methods=['POST'])
 def api_solve_arc_backtracking():
-	data = request.get_json(force=True, silent=True)
+	data = request_data()
 	if not data or 'board' not in data:
 		return jsonify({'error': 'Missing "board" in JSON payload'}), 400
 
@@ -101,21 +325,495 @@ def api_solve_arc_backtracking():
 	if not validate_board(board):
 		return jsonify({'error': 'Invalid board format. Must be 9x9 array of integers 0-9.'}), 400
 
-	board_copy = copy.deepcopy(board)
-	
+	rules = data.get('rules', solver.DEFAULT_RULES)
+	if not valid_rules(rules):
+		return jsonify({'error': 'Invalid "rules". Choose from: ' + ', '.join(arc.RULES)}), 400
+
+	trace_format = request.args.get('trace', 'verbose')
+	if trace_format not in solver_trace.FORMATS:
+		return jsonify({'error': 'Invalid "trace" format. Choose from: ' + ', '.join(solver_trace.FORMATS)}), 400
+
+	trace_level = request.args.get('trace_level', data.get('trace_level', 'full'))
+	if trace_level not in solver_trace.TRACE_LEVELS:
+		return jsonify({'error': 'Invalid "trace_level". Choose from: ' + ', '.join(solver_trace.TRACE_LEVELS)}), 400
+
+	budget, error = parse_budget(data)
+	if error:
+		return error
+
+	# Only the result is cached, keyed on the board as given (the search order
+	# depends on its orientation). Traces can be any length, so they are never
+	# cached: a request for one runs the search again.
+	cache_key = ('arc-backtracking', tuple(rules), str(board))
+	use_cache = data.get('cache', True)
+	cached = cache.solution_cache.get(cache_key) if use_cache and trace_level == 'none' else None
+
 	start = time.perf_counter()
-	solution, steps, solvable = solver.solve(board_copy)
+	if cached is None:
+		trace = solver_trace.new_trace(trace_format, trace_level)
+		stats = SearchStats(*budget)
+		try:
+			solution, trace, solvable = solver.solve(copy.deepcopy(board), rules, trace, trace_level, stats)
+		except BudgetExceeded as exc:
+			return budget_exceeded(exc, 'arc-backtracking', board, start)
+		steps = trace.encode(trace_format) if trace is not None else []
+		num_steps = len(trace) if trace is not None else 0
+		stats_block = stats.to_dict((time.perf_counter() - start) * 1000)
+		if use_cache:
+			cache.solution_cache.put(cache_key, (solution, solvable, stats_block))
+	else:
+		solution, solvable, stats_block = cached
+		steps, num_steps = [], 0
 	end = time.perf_counter()
 	time_taken = (end - start) * 1000
+	metrics.observe(request.path, 'arc-backtracking', time_taken, stats_block, board, cached is not None)
 
-	return jsonify({
-		'solution': solution,
+	response = {
+		'solution': board_out(solution),
 		'solvable': solvable,
 		'steps': steps,
-		'num_steps': len(steps),
+		'num_steps': num_steps,
+		'trace_format': trace_format,
+		'trace_level': trace_level,
+		'cached': cached is not None,
 		'time_taken_ms': time_taken
+	}
+	if trace_format != 'verbose':
+		response['trace_legend'] = solver_trace.describe(trace_format)
+	if wants_stats(data):
+		# For a cached response these are the counters of the original solve
+		response['stats'] = stats_block
+	return solutions_response(response, [solution])
+
+@app.route('/api/traces', methods=['POST'])
+def api_start_trace():
+	data = request_data()
+	if not data or 'board' not in data:
+		return jsonify({'error': 'Missing "board" in JSON payload'}), 400
+
+	board = data['board']
+	if not validate_board(board):
+		return jsonify({'error': 'Invalid board format. Must be 9x9 array of integers 0-9.'}), 400
+
+	rules = data.get('rules', solver.DEFAULT_RULES)
+	if not valid_rules(rules):
+		return jsonify({'error': 'Invalid "rules". Choose from: ' + ', '.join(arc.RULES)}), 400
+
+	trace_id = trace_store.start(board, rules)
+	if trace_id is None:
+		return jsonify({'error': 'Too many traces in progress, try again later'}), 503
+
+	return jsonify({'trace_id': trace_id}), 202
+
+
+def trace_summary(entry, encode=None):
+	summary = entry.summary()
+	summary['solution'] = (encode or board_encoder())(summary['solution'])
+	return summary
+
+
+@app.route('/api/traces/<trace_id>', methods=['GET'])
+def api_get_trace(trace_id):
+	start = request.args.get('start', 0, type=int)
+	count = request.args.get('count', 500, type=int)
+	if start < 0 or count < 1 or count > 10000:
+		return jsonify({'error': '"start" must be >= 0 and "count" between 1 and 10000'}), 400
+
+	steps, entry = trace_store.steps(trace_id, start, count)
+	if entry is None:
+		return jsonify({'error': 'Unknown or expired trace id'}), 404
+
+	return jsonify({
+		**trace_summary(entry),
+		'start': start,
+		'next': start + len(steps),
+		'steps': steps
 	})
 
+
+@app.route('/api/traces/<trace_id>/stream', methods=['GET'])
+def api_stream_trace(trace_id):
+	entry = trace_store.get(trace_id)
+	if entry is None:
+		return jsonify({'error': 'Unknown or expired trace id'}), 404
+
+	start = request.args.get('start', 0, type=int)
+	encode = board_encoder()
+
+	def generate():
+		# Server-sent events: one "step" event per step, then a "done" event
+		for step in trace_store.stream(entry, max(0, start)):
+			yield 'event: step\ndata: ' + json.dumps(step) + '\n\n'
+		yield 'event: done\ndata: ' + json.dumps(trace_summary(entry, encode)) + '\n\n'
+
+	return Response(generate(), mimetype='text/event-stream')
+
+
+@app.route('/api/traces/<trace_id>', methods=['DELETE'])
+def api_delete_trace(trace_id):
+	if not trace_store.delete(trace_id):
+		return jsonify({'error': 'Unknown or expired trace id'}), 404
+	return jsonify({'deleted': trace_id})
+
+
+def session_snapshot(session):
+	snapshot = session.snapshot()
+	snapshot['board'] = board_out(snapshot['board'])
+	return snapshot
+
+
+@app.route('/api/sessions', methods=['POST'])
+def api_start_session():
+	data = request_data()
+	if not data or 'board' not in data:
+		return jsonify({'error': 'Missing "board" in JSON payload'}), 400
+
+	board = data['board']
+	if not validate_board(board):
+		return jsonify({'error': 'Invalid board format. Must be 9x9 array of integers 0-9.'}), 400
+
+	return jsonify(session_snapshot(session_store.create(board))), 201
+
+
+@app.route('/api/sessions/<session_id>', methods=['GET'])
+def api_get_session(session_id):
+	session = session_store.get(session_id)
+	if session is None:
+		return jsonify({'error': 'Unknown or expired session id'}), 404
+
+	with session.lock:
+		return jsonify(session_snapshot(session))
+
+
+@app.route('/api/sessions/<session_id>/moves', methods=['POST'])
+def api_session_move(session_id):
+	"""Set one cell; answers with the conflicts, the peers' new candidates and optionally a hint."""
+	data = request_data()
+	if not data:
+		return jsonify({'error': 'Missing "row", "col" and "value" in JSON payload'}), 400
+
+	row, col, value = data.get('row'), data.get('col'), data.get('value')
+	if not all(isinstance(number, int) for number in (row, col, value)) \
+			or not 0 <= row <= 8 or not 0 <= col <= 8 or not 0 <= value <= 9:
+		return jsonify({'error': '"row" and "col" must be integers 0-8 and "value" an integer 0-9'}), 400
+
+	session = session_store.get(session_id)
+	if session is None:
+		return jsonify({'error': 'Unknown or expired session id'}), 404
+
+	start = time.perf_counter()
+	with session.lock:
+		try:
+			changed = session.edit(row * 9 + col, value)
+		except ValueError:
+			return jsonify({'error': 'Cannot change a given cell'}), 400
+		response = {
+			'row': row,
+			'col': col,
+			'value': value,
+			'conflicts': session.conflict_cells(),
+			'candidates': session.candidate_list(changed),
+			'solved': session.solved()
+		}
+		if data.get('hint'):
+			response['hint'] = session.hint()
+	response['time_taken_ms'] = (time.perf_counter() - start) * 1000
+	return jsonify(response)
+
+
+@app.route('/api/sessions/<session_id>/hint', methods=['GET'])
+def api_session_hint(session_id):
+	session = session_store.get(session_id)
+	if session is None:
+		return jsonify({'error': 'Unknown or expired session id'}), 404
+
+	with session.lock:
+		return jsonify({'hint': session.hint()})
+
+
+@app.route('/api/sessions/<session_id>', methods=['DELETE'])
+def api_delete_session(session_id):
+	if not session_store.delete(session_id):
+		return jsonify({'error': 'Unknown or expired session id'}), 404
+	return jsonify({'deleted': session_id})
+
+
+@app.route('/api/sessions/stats', methods=['GET'])
+def api_session_stats():
+	return jsonify(session_store.stats())
+
+
+@app.route('/api/solve/dlx', methods=['POST'])
+def api_solve_dlx():
+	data = request_data()
+	if not data or 'board' not in data:
+		return jsonify({'error': 'Missing "board" in JSON payload'}), 400
+
+	board = data['board']
+	if not validate_board(board):
+		return jsonify({'error': 'Invalid board format. Must be 9x9 array of integers 0-9.'}), 400
+
+	budget, error = parse_budget(data)
+	if error:
+		return error
+
+	stats = SearchStats(*budget)
+
+	def solve(board):
+		return dlx.get_solution(board, stats)
+
+	start = time.perf_counter()
+	try:
+		if data.get('cache', True):
+			solution, cached = cache.get_solution(board, solve, 'dlx')
+		else:
+			solution, cached = solve(board), False
+	except BudgetExceeded as exc:
+		return budget_exceeded(exc, 'dlx', board, start)
+	end = time.perf_counter()
+	time_taken = (end - start) * 1000
+	stats_block = None if cached else stats.to_dict(time_taken)
+	metrics.observe(request.path, 'dlx', time_taken, stats_block, board, cached)
+
+	response = {
+		'solution': board_out(solution),
+		'solvable': solution is not None,
+		'cached': cached,
+		'time_taken_ms': time_taken
+	}
+	if wants_stats(data):
+		response['stats'] = stats_block
+	return solutions_response(response, [solution])
+
+
+@app.route('/api/solve/auto', methods=['POST'])
+def api_solve_auto():
+	"""Race several engines in separate processes and answer with the first to finish."""
+	data = request_data()
+	if not data or 'board' not in data:
+		return jsonify({'error': 'Missing "board" in JSON payload'}), 400
+
+	board = data['board']
+	if not validate_board(board):
+		return jsonify({'error': 'Invalid board format. Must be 9x9 array of integers 0-9.'}), 400
+
+	engines = data.get('engines', list(portfolio.DEFAULT_PORTFOLIO))
+	if not isinstance(engines, list) or not engines \
+			or any(not isinstance(engine, str) or engine not in portfolio.ENGINES for engine in engines):
+		return jsonify({'error': '"engines" must be a list of: ' + ', '.join(portfolio.ENGINES)}), 400
+
+	budget, error = parse_budget(data)
+	if error:
+		return error
+
+	def race(board):
+		result = portfolio.portfolio.solve(board, tuple(engines), *budget)
+		if 'budget_exceeded' in result:
+			raise BudgetExceeded(result['budget_exceeded'], result['search_stats'])
+		return {'solution': result['solution'], 'engine': result['engine'], 'stats': result['stats']}
+
+	start = time.perf_counter()
+	try:
+		if data.get('cache', True):
+			# Cached per set of engines, with the winner and its stats, which a hit reports as they were
+			result, cached = cache.get_analysis(board, race, ('auto', tuple(sorted(engines))))
+		else:
+			result, cached = race(board), False
+	except BudgetExceeded as exc:
+		return budget_exceeded(exc, 'auto', board, start)
+	time_taken = (time.perf_counter() - start) * 1000
+	solution = result['solution']
+	# Metrics are kept per winning engine, which is what the portfolio is tuned from
+	metrics.observe(request.path, result['engine'], time_taken, None if cached else result['stats'], board, cached)
+
+	response = {
+		'solution': board_out(solution),
+		'solvable': solution is not None,
+		'engine': result['engine'],
+		'engines': list(engines),
+		'cached': cached,
+		'time_taken_ms': time_taken
+	}
+	if wants_stats(data):
+		response['stats'] = result['stats']
+	return solutions_response(response, [solution])
+
+
+@app.route('/api/solutions', methods=['POST'])
+def api_solutions():
+	data = request_data()
+	if not data or 'board' not in data:
+		return jsonify({'error': 'Missing "board" in JSON payload'}), 400
+
+	board = data['board']
+	if not validate_board(board):
+		return jsonify({'error': 'Invalid board format. Must be 9x9 array of integers 0-9.'}), 400
+
+	if not is_board_valid(board):
+		return jsonify({'error': 'Invalid board: duplicate values found in row, column, or box.'}), 400
+
+	limit = data.get('limit', 100)
+	if not isinstance(limit, int) or limit < 1 or limit > MAX_SOLUTIONS_LIMIT:
+		return jsonify({'error': f'"limit" must be between 1 and {MAX_SOLUTIONS_LIMIT}'}), 400
+
+	solver_name = data.get('solver', 'dlx')
+	if not isinstance(solver_name, str) or solver_name not in SOLUTION_ENGINES:
+		return jsonify({'error': 'Invalid "solver". Choose from: ' + ', '.join(SOLUTION_ENGINES)}), 400
+
+	budget, error = parse_budget(data)
+	if error:
+		return error
+
+	iter_solutions = SOLUTION_ENGINES[solver_name]
+	include_stats = wants_stats(data)
+	endpoint = request.path
+	encode = board_encoder()
+
+	def generate():
+		# One line per solution as the search finds it, then a summary line.
+		# Only the current solution is held, so memory does not grow with limit.
+		stats = SearchStats(*budget)
+		start = time.perf_counter()
+		count = 0
+		complete = True
+		exceeded = None
+		try:
+			for solution in iter_solutions(board, stats=stats):
+				yield json.dumps({'index': count, 'solution': encode(solution)}) + '\n'
+				count += 1
+				if count >= limit:
+					complete = False
+					break
+		except BudgetExceeded as exc:
+			complete = False
+			exceeded = exc.reason
+		time_taken = (time.perf_counter() - start) * 1000
+		stats_block = stats.to_dict(time_taken)
+		metrics.observe(endpoint, solver_name, time_taken, stats_block, board, budget_exceeded=exceeded is not None)
+
+		summary = {'done': True, 'count': count, 'complete': complete, 'time_taken_ms': time_taken}
+		if exceeded:
+			summary['budget_exceeded'] = exceeded
+		if include_stats:
+			summary['stats'] = stats_block
+		yield json.dumps(summary) + '\n'
+
+	return Response(generate(), mimetype='application/x-ndjson')
+
+
+@app.route('/api/cache/stats', methods=['GET'])
+def api_cache_stats():
+	return jsonify(cache.solution_cache.stats())
+
+
+@app.route('/api/metrics', methods=['GET'])
+def api_metrics():
+	return jsonify(metrics.snapshot())
+
+
+@app.route('/api/metrics', methods=['DELETE'])
+def api_reset_metrics():
+	metrics.reset()
+	return jsonify({'reset': True})
+
+
+def record_batch_result(endpoint, result, boards, solver_name, include_stats, encode):
+	"""Feed one batch result into the metrics; drops its stats unless requested and encodes its solution."""
+	metrics.observe(endpoint, solver_name, result['time_taken_ms'], result['stats'], boards[result['index']],
+		budget_exceeded='budget_exceeded' in result)
+	if not include_stats:
+		del result['stats']
+	result['solution'] = encode(result['solution'])
+	return result
+
+def first_malformed_board(boards):
+	"""Index of the first board that is not a 9x9 array of integers 0-9, or None.
+
+	The whole batch is checked at once with bulk.to_array; boards are only
+	walked one by one to locate the culprit once that check fails.
+	"""
+	if boards:
+		try:
+			_, in_range = bulk.to_array(boards)
+		except ValueError:
+			pass
+		else:
+			if in_range.all():
+				return None
+	for index, board in enumerate(boards):
+		if not validate_board(board):
+			return index
+	return None
+
+def parse_batch_request(data):
+	"""Validate a batch payload; returns (boards, solver, workers, budget, error response).
+
+	The budget from "time_limit_ms" / "max_nodes" applies to each board separately.
+	"""
+	if not data or 'boards' not in data or not isinstance(data['boards'], list):
+		return None, None, None, None, (jsonify({'error': 'Missing "boards" list in JSON payload'}), 400)
+
+	boards = data['boards']
+	index = first_malformed_board(boards)
+	if index is not None:
+		return None, None, None, None, (jsonify({'error': f'Invalid board format at index {index}. Must be 9x9 array of integers 0-9.'}), 400)
+
+	solver_name = data.get('solver', 'dlx')
+	if not isinstance(solver_name, str) or solver_name not in batch.SOLVERS:
+		return None, None, None, None, (jsonify({'error': 'Invalid "solver". Choose from: ' + ', '.join(batch.SOLVERS)}), 400)
+
+	workers = data.get('workers')
+	if workers is not None and (not isinstance(workers, int) or workers < 1 or workers > batch.DEFAULT_WORKERS):
+		return None, None, None, None, (jsonify({'error': f'"workers" must be between 1 and {batch.DEFAULT_WORKERS}'}), 400)
+
+	budget, error = parse_budget(data)
+	if error:
+		return None, None, None, None, error
+
+	return boards, solver_name, workers, budget, None
+
+
+@app.route('/api/solve/batch', methods=['POST'])
+def api_solve_batch():
+	boards, solver_name, workers, budget, error = parse_batch_request(request_data())
+	if error:
+		return error
+
+	results, stats = batch.solve_batch(boards, solver_name, workers, *budget)
+	include_stats = wants_stats(request_data())
+	solutions = [result['solution'] for result in results]
+	encode = board_encoder()
+	for result in results:
+		record_batch_result(request.path, result, boards, solver_name, include_stats, encode)
+
+	return solutions_response({
+		'solver': solver_name,
+		'results': results,
+		**stats
+	}, solutions)
+
+
+@app.route('/api/solve/batch/stream', methods=['POST'])
+def api_solve_batch_stream():
+	boards, solver_name, workers, budget, error = parse_batch_request(request_data())
+	if error:
+		return error
+
+	include_stats = wants_stats(request_data())
+	endpoint = request.path
+	encode = board_encoder()
+
+	def generate():
+		# One JSON object per line as boards finish, then a summary line
+		start = time.perf_counter()
+		count = 0
+		for result in batch.iter_solve_batch(boards, solver_name, workers, *budget):
+			count += 1
+			yield json.dumps(record_batch_result(endpoint, result, boards, solver_name, include_stats, encode)) + '\n'
+		yield json.dumps({'done': True, 'count': count, 'time_taken_ms': (time.perf_counter() - start) * 1000}) + '\n'
+
+	return Response(generate(), mimetype='application/x-ndjson')
+
 def countFilled(board):
 	c = 0
 	for i in range(0,9):
@@ -126,7 +824,10 @@ def countFilled(board):
 
 @app.route('/api/generate', methods=['POST'])
 def api_generate():
-	data = request.get_json(force=True, silent=True)
+	data = request_data()
+	if data and 'score' in data:
+		return generate_graded(data)
+
 	if not data or 'difficulty' not in data:
 		return jsonify({'error': 'Missing "difficulty" in JSON payload'}), 400
 
@@ -148,20 +849,61 @@ def api_generate():
 		if filled_cells < 17 or filled_cells > 81:
 			return jsonify({'error': 'Difficulty must be between 17 and 81'}), 400
 	
+	time_budget = data.get('time_budget_ms')
+	if time_budget is not None:
+		if not isinstance(time_budget, (int, float)) or time_budget <= 0:
+			return jsonify({'error': '"time_budget_ms" must be a positive number'}), 400
+		time_budget = time_budget / 1000
+	
 	start = time.perf_counter()
-	print(filled_cells)
-	board = generate_puzzle(filled_cells)
-	print(countFilled(board))
+	if filled_cells in puzzle_pool.pools:
+		puzzle_pool.start()
+		board, from_pool = puzzle_pool.pop(filled_cells, time_budget)
+	else:
+		board, from_pool = generate_puzzle(filled_cells, time_budget, GENERATE_WORKERS), False
 	end = time.perf_counter()
 	time_taken = (end - start) * 1000
 
 	return jsonify({
-		'board': board,
+		'board': board_out(board),
 		'filled_cells': filled_cells,
+		'actual_filled_cells': countFilled(board),
+		'from_pool': from_pool,
 		'time_taken_ms': time_taken
 	})
 
 
+def generate_graded(data):
+	"""Generate a puzzle whose effort-based score falls in the requested band."""
+	band = data['score']
+	if isinstance(band, str) and band.lower() in grading.BANDS:
+		band = grading.BANDS[band.lower()]
+	if not isinstance(band, (list, tuple)) or len(band) != 2 or not all(isinstance(x, (int, float)) for x in band) or band[0] > band[1]:
+		return jsonify({'error': 'Invalid "score". Use [min, max] or one of: ' + ', '.join(grading.BANDS)}), 400
+
+	time_budget = data.get('time_budget_ms', 5000)
+	if not isinstance(time_budget, (int, float)) or time_budget <= 0:
+		return jsonify({'error': '"time_budget_ms" must be a positive number'}), 400
+
+	start = time.perf_counter()
+	board, grade, in_band = grading.generate_graded(band[0], band[1], time_budget / 1000)
+	end = time.perf_counter()
+	time_taken = (end - start) * 1000
+
+	return jsonify({
+		'board': board_out(board),
+		'actual_filled_cells': countFilled(board),
+		'grade': grade,
+		'in_band': in_band,
+		'time_taken_ms': time_taken
+	})
+
+
+@app.route('/api/pool/stats', methods=['GET'])
+def api_pool_stats():
+	return jsonify(puzzle_pool.stats())
+
+
 if __name__ == '__main__':
 	# When running directly, start the Flask dev server
     app.run(host='0.0.0.0', port=8080, debug=True)
@@ -0,0 +1,136 @@
+"""In-process request metrics: latency and search-effort histograms per endpoint and solver.
+
+Every solve served by the API is recorded here with its wall time and, when
+the solver was instrumented, its SearchStats counters. /api/metrics returns
+the histograms together with the slowest inputs seen, which is where
+pathological puzzles show up.
+"""
+
+import heapq
+import math
+import threading
+
+# Upper bounds of the histogram buckets; the last bucket is unbounded
+TIME_BUCKETS_MS = (1, 2, 5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000, 10000, math.inf)
+COUNT_BUCKETS = (0, 10, 100, 1000, 10000, 100000, 1000000, 10000000, math.inf)
+
+# Number of slowest requests kept, with their boards
+SLOWEST = 10
+
+
+class Histogram:
+    def __init__(self, bounds):
+        self.bounds = bounds
+        self.counts = [0] * len(bounds)
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+
+    def observe(self, value):
+        for i, bound in enumerate(self.bounds):
+            if value <= bound:
+                self.counts[i] += 1
+                break
+        self.count += 1
+        self.total += value
+        self.max = max(self.max, value)
+
+    def to_dict(self):
+        """Cumulative bucket counts, keyed by upper bound as in Prometheus."""
+        buckets = {}
+        running = 0
+        for bound, count in zip(self.bounds, self.counts):
+            running += count
+            buckets["+Inf" if bound == math.inf else str(bound)] = running
+        return {
+            "count": self.count,
+            "sum": self.total,
+            "mean": self.total / self.count if self.count else 0.0,
+            "max": self.max,
+            "buckets": buckets,
+        }
+
+
+class _Series:
+    """Histograms for one (endpoint, solver) pair."""
+
+    def __init__(self):
+        self.time_ms = Histogram(TIME_BUCKETS_MS)
+        self.propagation_ms = Histogram(TIME_BUCKETS_MS)
+        self.nodes = Histogram(COUNT_BUCKETS)
+        self.backtracks = Histogram(COUNT_BUCKETS)
+        self.max_depth = Histogram(COUNT_BUCKETS)
+        self.cached = 0
+        self.budget_exceeded = 0
+
+    def to_dict(self):
+        return {
+            "requests": self.time_ms.count,
+            "cached": self.cached,
+            "budget_exceeded": self.budget_exceeded,
+            "time_ms": self.time_ms.to_dict(),
+            "propagation_ms": self.propagation_ms.to_dict(),
+            "nodes": self.nodes.to_dict(),
+            "backtracks": self.backtracks.to_dict(),
+            "max_depth": self.max_depth.to_dict(),
+        }
+
+
+class Metrics:
+    def __init__(self, slowest=SLOWEST):
+        self.slowest_kept = slowest
+        self._series = {}
+        self._slowest = []
+        self._observed = 0
+        self._lock = threading.Lock()
+
+    def observe(self, endpoint, solver_name, time_ms, stats=None, board=None, cached=False, budget_exceeded=False):
+        """Record one solve; stats is a SearchStats.to_dict() result, or None if not instrumented."""
+        with self._lock:
+            series = self._series.get((endpoint, solver_name))
+            if series is None:
+                series = self._series[(endpoint, solver_name)] = _Series()
+            series.time_ms.observe(time_ms)
+            self._observed += 1
+            if cached:
+                series.cached += 1
+                return
+            if budget_exceeded:
+                series.budget_exceeded += 1
+            if stats is not None:
+                series.propagation_ms.observe(stats["propagation_ms"])
+                series.nodes.observe(stats["nodes"])
+                series.backtracks.observe(stats["backtracks"])
+                series.max_depth.observe(stats["max_depth"])
+
+            if board is not None and (len(self._slowest) < self.slowest_kept or time_ms > self._slowest[0][0]):
+                # The sequence number keeps ties from comparing the stats dicts
+                entry = (time_ms, self._observed, endpoint, solver_name, _board_key(board), stats)
+                if len(self._slowest) < self.slowest_kept:
+                    heapq.heappush(self._slowest, entry)
+                else:
+                    heapq.heapreplace(self._slowest, entry)
+
+    def snapshot(self):
+        with self._lock:
+            series = {}
+            for (endpoint, solver_name), entry in sorted(self._series.items()):
+                series.setdefault(endpoint, {})[solver_name] = entry.to_dict()
+            slowest = [
+                {"time_ms": time_ms, "endpoint": endpoint, "solver": solver_name, "board": board, "stats": stats}
+                for time_ms, _, endpoint, solver_name, board, stats in sorted(self._slowest, reverse=True)
+            ]
+        return {"endpoints": series, "slowest": slowest}
+
+    def reset(self):
+        with self._lock:
+            self._series.clear()
+            self._slowest.clear()
+
+
+def _board_key(board):
+    # 81-character string; small enough to keep and easy to replay
+    return "".join(str(cell) for row in board for cell in row)
+
+
+metrics = Metrics()
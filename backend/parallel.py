@@ -0,0 +1,140 @@
+"""Search one puzzle on several cores by splitting its search tree.
+
+The board is propagated as in backtracking.analyze and handed to a job_pool
+job as a single task. Whenever a worker is idle and no subproblem is queued,
+the job is flagged SPLIT: the running searches stop at their next budget
+check and hand back the unexplored part of their tree as independent
+subproblems (backtracking._open_branches), which the idle workers pick up.
+So busy workers give work away exactly when others run dry, however
+unbalanced the tree is. Subproblems are disjoint, so their solution counts
+simply add up.
+"""
+
+import os
+import time
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, wait
+
+import backtracking
+from arc import ArcState
+from board_state import BoardState
+from job_pool import RUN, SPLIT, JobPool, job_flag
+from stats import BudgetExceeded, SearchStats
+
+WORKERS = int(os.environ.get("SUDOKU_PARALLEL_WORKERS", os.cpu_count() or 1))
+
+_pool = None
+
+
+def get_pool():
+    global _pool
+    if _pool is None:
+        _pool = JobPool(WORKERS)
+    return _pool
+
+
+def _search(slot, board, branch, limit, time_limit, max_nodes):
+    """Count up to limit solutions of board with branch applied; splits when flagged."""
+    board = [row[:] for row in board]
+    for idx, num in branch:
+        board[idx // 9][idx % 9] = num
+
+    # The flag that stopped the search: it may be back to RUN by the time BudgetExceeded is handled
+    seen = [RUN]
+
+    def cancel():
+        seen[0] = job_flag(slot)
+        return seen[0] != RUN
+
+    stats = SearchStats(time_limit, max_nodes, cancel=cancel)
+    state = BoardState(board)
+    result = {"count": 0, "solution": None, "branches": [], "budget_exceeded": None}
+    try:
+        for _ in backtracking._solutions(state, state.empty_cells(), stats, mrv=True):
+            if result["solution"] is None:
+                result["solution"] = state.to_board()
+            result["count"] += 1
+            if result["count"] >= limit:
+                break
+    except BudgetExceeded as exc:
+        if exc.reason == "cancelled" and seen[0] == SPLIT:
+            result["branches"] = [branch + rest for rest in exc.branches]
+        else:
+            result["budget_exceeded"] = exc.reason
+
+    # The cancel hook only works inside this worker
+    stats.cancel = None
+    result["stats"] = stats
+    return result
+
+
+def analyze(board, max_solutions=2, stats=None, pool=None):
+    """backtracking.analyze, with the search spread over the workers of pool.
+
+    Returns the same dict. If stats is given it receives the counters of every
+    task; its time limit applies to the whole call, and its node limit to the
+    sum of all tasks (checked as tasks come back, so it can be overshot by what
+    the tasks still running use). The first solution found is not necessarily
+    the first one in search order.
+    """
+    pool = pool or get_pool()
+    stats = stats or SearchStats()
+    start = time.perf_counter()
+    state = ArcState(board, None, backtracking.PRECHECK_RULES, "none")
+    ok = stats.propagate(state, state.assigned_cells())
+
+    count = 0
+    solution = None
+    time_to_first = None
+    if ok:
+        propagated = [row[:] for row in board]
+        state.write_to(propagated)
+        queue = deque([[]])
+        running = set()
+        job = pool.start_job()
+        try:
+            while queue or running:
+                while queue and len(running) < pool.workers:
+                    time_limit = None
+                    if stats.deadline is not None:
+                        time_limit = stats.deadline - time.perf_counter()
+                        if time_limit <= 0:
+                            raise BudgetExceeded("time", stats)
+                    max_nodes = None if stats.max_nodes is None else stats.max_nodes - stats.nodes
+                    running.add(job.submit(_search, propagated, queue.popleft(), max_solutions - count,
+                                           time_limit, max_nodes))
+                # Idle workers and nothing queued: make the running searches give work away
+                job.signal(SPLIT if len(running) < pool.workers and not queue else RUN)
+
+                done, running = wait(running, return_when=FIRST_COMPLETED)
+                for future in done:
+                    result = future.result()
+                    stats.add(result["stats"])
+                    if result["budget_exceeded"]:
+                        raise BudgetExceeded(result["budget_exceeded"], stats)
+                    if stats.max_nodes is not None and stats.nodes > stats.max_nodes:
+                        raise BudgetExceeded("nodes", stats)
+                    if result["count"] and solution is None:
+                        solution = result["solution"]
+                        time_to_first = (time.perf_counter() - start) * 1000
+                    count += result["count"]
+                    queue.extend(result["branches"])
+                if count >= max_solutions:
+                    count = max_solutions
+                    break
+        finally:
+            job.finish()
+
+    time_taken = (time.perf_counter() - start) * 1000
+    return {
+        "solvable": count > 0,
+        "number_of_solutions": count,
+        "solution": solution,
+        "time_to_first_ms": time_taken if time_to_first is None else time_to_first,
+        "time_taken_ms": time_taken,
+    }
+
+
+def get_number_of_solutions(board, max_solutions=2, stats=None, pool=None):
+    """Count solutions in parallel, stopping once max_solutions have been found."""
+    return analyze(board, max_solutions, stats, pool)["number_of_solutions"]
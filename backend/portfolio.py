@@ -0,0 +1,121 @@
+"""Race several engines on one puzzle in separate processes; the first answer wins.
+
+Each engine runs as a task of one job_pool job. Once the winner is in, the
+job is finished: the losers see the STOP flag through the budget check of
+their SearchStats and give up within CHECK_EVERY nodes, which frees their
+workers for the next race without restarting processes.
+"""
+
+import copy
+import os
+import time
+from concurrent.futures import FIRST_COMPLETED, wait
+
+import backtracking
+import batch
+from job_pool import RUN, JobPool, job_flag
+from stats import BudgetExceeded, SearchStats
+
+
+def _backtracking_strategy(strategy):
+    def solve(board, stats):
+        solution = backtracking.get_solution(copy.deepcopy(board), strategy=strategy, stats=stats)
+        return {"solution": solution, "solvable": solution is not None}
+    return solve
+
+
+# engine name -> solve(board, stats) returning {"solution", "solvable"}
+ENGINES = {
+    "dlx": batch.SOLVERS["dlx"],
+    "arc-backtracking": batch.SOLVERS["arc-backtracking"],
+    "backtracking": batch.SOLVERS["backtracking"],
+    "backtracking:mrv_lcv": _backtracking_strategy("mrv_lcv"),
+    "backtracking:random_restarts": _backtracking_strategy("random_restarts"),
+}
+DEFAULT_PORTFOLIO = tuple(os.environ.get(
+    "SUDOKU_PORTFOLIO", "dlx,arc-backtracking,backtracking:mrv_lcv,backtracking:random_restarts").split(","))
+WORKERS = int(os.environ.get("SUDOKU_PORTFOLIO_WORKERS", len(DEFAULT_PORTFOLIO)))
+
+
+def _run(slot, engine, board, deadline, max_nodes):
+    if job_flag(slot) != RUN:
+        # Another engine won while this task was still queued
+        return {"engine": engine, "budget_exceeded": "cancelled"}
+
+    # deadline is wall-clock time (shared by all processes), so time spent queued counts
+    time_limit = None
+    if deadline is not None:
+        time_limit = deadline - time.time()
+        if time_limit <= 0:
+            return {"engine": engine, "budget_exceeded": "time"}
+
+    stats = SearchStats(time_limit, max_nodes, cancel=lambda: job_flag(slot) != RUN)
+    start = time.perf_counter()
+    try:
+        result = ENGINES[engine](board, stats)
+    except BudgetExceeded as exc:
+        # The counters go back to the parent, which sums them if no engine wins
+        stats.cancel = None
+        result = {"budget_exceeded": exc.reason, "search_stats": stats}
+    time_taken = (time.perf_counter() - start) * 1000
+    result["engine"] = engine
+    result["time_taken_ms"] = time_taken
+    result["stats"] = stats.to_dict(time_taken)
+    return result
+
+
+class Portfolio:
+    """Races engines on a JobPool of its own."""
+
+    def __init__(self, workers=WORKERS):
+        self.pool = JobPool(workers)
+
+    def close(self):
+        self.pool.close()
+
+    def solve(self, board, engines=DEFAULT_PORTFOLIO, time_limit=None, max_nodes=None):
+        """Race engines on board; returns the first result that is not out of budget.
+
+        The result holds "solution", "solvable", the winning "engine", its
+        "time_taken_ms" and "stats", plus "wall_time_ms" for the whole race.
+        If every engine runs out of budget, the result has solvable None and
+        "budget_exceeded" ("time" if any engine hit the time limit), with
+        the counters of all engines summed in "search_stats". The time
+        limit runs from the start of the race, including time an engine
+        waits for a worker; max_nodes applies to each engine separately.
+        """
+        job = self.pool.start_job()
+        start = time.perf_counter()
+        deadline = time.time() + time_limit if time_limit is not None else None
+        pending = {job.submit(_run, engine, board, deadline, max_nodes) for engine in engines}
+
+        winner = None
+        reasons = []
+        spent = SearchStats()
+        try:
+            while pending and winner is None:
+                done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                for future in done:
+                    result = future.result()
+                    if "budget_exceeded" not in result:
+                        winner = result
+                        break
+                    reasons.append(result["budget_exceeded"])
+                    if "search_stats" in result:
+                        spent.add(result["search_stats"])
+        finally:
+            job.finish()
+
+        if winner is None:
+            winner = {
+                "solution": None,
+                "solvable": None,
+                "engine": None,
+                "budget_exceeded": "time" if "time" in reasons else "nodes",
+                "search_stats": spent,
+            }
+        winner["wall_time_ms"] = (time.perf_counter() - start) * 1000
+        return winner
+
+
+portfolio = Portfolio()
@@ -0,0 +1,159 @@
+"""Per-difficulty pools of ready puzzles, refilled in the background.
+
+Each pool holds puzzles for one filled-cell count. When a pool drops below
+its low-water mark a background thread generates puzzles on a process pool
+until it is back at full depth. Pools are persisted to a JSON file so they
+survive restarts; the same thread saves them after refills and, at most once
+every SAVE_INTERVAL seconds, after puzzles were served, so a restart does not
+hand out served puzzles again.
+"""
+
+import json
+import os
+import threading
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+
+from generate_board import generate_puzzle, EASY, MEDIUM, HARD
+
+DEFAULT_PATH = os.environ.get("SUDOKU_POOL_PATH", os.path.join(os.path.dirname(os.path.abspath(__file__)), "puzzle_pool.json"))
+DEFAULT_DEPTH = int(os.environ.get("SUDOKU_POOL_DEPTH", 50))
+DEFAULT_LOW_WATER = int(os.environ.get("SUDOKU_POOL_LOW_WATER", 10))
+DEFAULT_WORKERS = int(os.environ.get("SUDOKU_POOL_WORKERS", 1))
+# Seconds between two saves triggered by served puzzles
+SAVE_INTERVAL = float(os.environ.get("SUDOKU_POOL_SAVE_INTERVAL", 5))
+
+# Window over which the refill rate is measured
+RATE_WINDOW = 60.0
+
+
+class PuzzlePool:
+    def __init__(self, difficulties=(EASY, MEDIUM, HARD), path=DEFAULT_PATH, depth=DEFAULT_DEPTH,
+                 low_water=DEFAULT_LOW_WATER, workers=DEFAULT_WORKERS):
+        self.path = path
+        self.depth = depth
+        self.low_water = low_water
+        self.workers = workers
+        self.pools = {difficulty: deque() for difficulty in difficulties}
+        self.served = {difficulty: 0 for difficulty in difficulties}
+        self.fallbacks = {difficulty: 0 for difficulty in difficulties}
+        self.generated = 0
+        self._recent = deque()
+        self._lock = threading.Lock()
+        self._wake = threading.Event()
+        self._thread = None
+        self._stopped = False
+        # Pools changed since the last save, and when that save happened
+        self._dirty = False
+        self._saved_at = time.monotonic()
+        self._load()
+
+    def _load(self):
+        try:
+            with open(self.path) as f:
+                stored = json.load(f)
+        except (OSError, ValueError):
+            return
+        for difficulty, puzzles in stored.items():
+            if int(difficulty) in self.pools:
+                self.pools[int(difficulty)].extend(puzzles[:self.depth])
+
+    def _save(self):
+        with self._lock:
+            stored = {str(difficulty): list(puzzles) for difficulty, puzzles in self.pools.items()}
+            self._dirty = False
+            self._saved_at = time.monotonic()
+        tmp_path = self.path + ".tmp"
+        with open(tmp_path, "w") as f:
+            json.dump(stored, f)
+        os.replace(tmp_path, self.path)
+
+    def start(self):
+        """Start the background refill thread (idempotent)."""
+        with self._lock:
+            if self._thread is not None:
+                return
+            self._thread = threading.Thread(target=self._refill_loop, name="puzzle-pool-refill", daemon=True)
+            self._thread.start()
+
+    def stop(self):
+        self._stopped = True
+        self._wake.set()
+
+    def pop(self, difficulty, time_budget=None):
+        """Return (puzzle, from_pool); generates synchronously when the pool is empty.
+
+        time_budget (seconds) bounds that synchronous generation, as in
+        generate_puzzle.
+        """
+        with self._lock:
+            pool = self.pools.get(difficulty)
+            puzzle = pool.popleft() if pool else None
+            if pool is not None:
+                if puzzle is not None:
+                    self.served[difficulty] += 1
+                    if not self._dirty:
+                        self._dirty = True
+                        self._wake.set()
+                else:
+                    self.fallbacks[difficulty] += 1
+                if len(pool) < self.low_water:
+                    self._wake.set()
+
+        if puzzle is not None:
+            return puzzle, True
+        return generate_puzzle(difficulty, time_budget), False
+
+    def _save_delay(self):
+        """Seconds until unsaved pops are due to be saved (0 if now), or None if there are none."""
+        with self._lock:
+            if not self._dirty:
+                return None
+            return max(0.0, self._saved_at + SAVE_INTERVAL - time.monotonic())
+
+    def _needs_refill(self):
+        with self._lock:
+            return [difficulty for difficulty, pool in self.pools.items() if len(pool) < self.low_water]
+
+    def _refill_loop(self):
+        with ProcessPoolExecutor(max_workers=self.workers) as executor:
+            while not self._stopped:
+                low = self._needs_refill()
+                if not low:
+                    delay = self._save_delay()
+                    if delay == 0:
+                        self._save()
+                        continue
+                    self._wake.wait(delay)
+                    self._wake.clear()
+                    continue
+                for difficulty in low:
+                    with self._lock:
+                        missing = self.depth - len(self.pools[difficulty])
+                    for puzzle in executor.map(generate_puzzle, [difficulty] * missing):
+                        with self._lock:
+                            self.pools[difficulty].append(puzzle)
+                            self.generated += 1
+                            self._recent.append(time.monotonic())
+                        if self._stopped:
+                            return
+                self._save()
+
+    def stats(self):
+        with self._lock:
+            now = time.monotonic()
+            while self._recent and self._recent[0] < now - RATE_WINDOW:
+                self._recent.popleft()
+            return {
+                "depth": {difficulty: len(pool) for difficulty, pool in self.pools.items()},
+                "max_depth": self.depth,
+                "low_water": self.low_water,
+                "served": dict(self.served),
+                "sync_fallbacks": dict(self.fallbacks),
+                "generated": self.generated,
+                "refill_rate_per_sec": len(self._recent) / RATE_WINDOW,
+            }
+
+
+puzzle_pool = PuzzlePool()
@@ -0,0 +1,234 @@
+"""Server-side boards edited one cell at a time.
+
+A session keeps, besides the cells, how often each digit occurs in each of
+the 27 units, the candidate mask of every empty cell, and how many cells of
+each unit can still take each digit. An edit touches only the cell, its 20
+peers and their units, so conflicts, the changed candidates and a hint
+(a naked or hidden single) come back in time proportional to the edit
+instead of a rescan of the board. Players may enter clashing digits; those
+cells are reported as conflicts rather than rejected.
+
+The store is bounded by session count and idle time, evicting the least
+recently used sessions first.
+"""
+
+import os
+import threading
+import time
+import uuid
+from collections import OrderedDict
+
+from board_state import BOX_OF, COL_OF, FULL, MASK_DIGITS, MASK_SIZE, PEERS, ROW_OF, UNITS
+
+MAX_SESSIONS = int(os.environ.get("SUDOKU_SESSION_MAX", 10000))
+SESSION_TTL = float(os.environ.get("SUDOKU_SESSION_TTL", 3600))
+
+# Indexes into UNITS of the row, column and box of each cell
+UNITS_OF = [(ROW_OF[idx], 9 + COL_OF[idx], 18 + BOX_OF[idx]) for idx in range(81)]
+
+
+def _cell(idx):
+    return [idx // 9, idx % 9]
+
+
+class Session:
+    def __init__(self, session_id, board):
+        self.id = session_id
+        self.cells = [0] * 81
+        self.givens = frozenset(i * 9 + j for i in range(9) for j in range(9) if board[i][j] != 0)
+        # Occurrences of digit d in unit u at counts[u * 9 + d - 1]; used[u] has a bit per present digit
+        self.counts = [0] * (27 * 9)
+        self.used = [0] * 27
+        self.candidates = [0] * 81
+        # Empty cells of unit u that can take digit d, at places[u * 9 + d - 1]
+        self.places = [0] * (27 * 9)
+        self.conflicts = set()
+        self.naked_singles = set()
+        self.hidden_singles = set()
+        self.filled = 0
+        self.lock = threading.Lock()
+        self.last_access = time.monotonic()
+
+        for idx in self.givens:
+            self._place(idx, board[idx // 9][idx % 9])
+        for idx in range(81):
+            if self.cells[idx] == 0:
+                self._set_candidates(idx, self._free(idx))
+            elif self._clashes(idx):
+                self.conflicts.add(idx)
+
+    def _free(self, idx):
+        row, col, box = UNITS_OF[idx]
+        used = self.used
+        return FULL & ~(used[row] | used[col] | used[box])
+
+    def _clashes(self, idx):
+        offset = self.cells[idx] - 1
+        counts = self.counts
+        return any(counts[unit * 9 + offset] > 1 for unit in UNITS_OF[idx])
+
+    def _place(self, idx, num):
+        self.cells[idx] = num
+        self.filled += 1
+        bit = 1 << (num - 1)
+        for unit in UNITS_OF[idx]:
+            self.counts[unit * 9 + num - 1] += 1
+            self.used[unit] |= bit
+
+    def _clear(self, idx):
+        num = self.cells[idx]
+        self.cells[idx] = 0
+        self.filled -= 1
+        for unit in UNITS_OF[idx]:
+            key = unit * 9 + num - 1
+            self.counts[key] -= 1
+            if self.counts[key] == 0:
+                self.used[unit] &= ~(1 << (num - 1))
+
+    def _set_candidates(self, idx, mask):
+        old = self.candidates[idx]
+        if mask == old:
+            return
+        self.candidates[idx] = mask
+        if MASK_SIZE[mask] == 1:
+            self.naked_singles.add(idx)
+        else:
+            self.naked_singles.discard(idx)
+
+        places, hidden = self.places, self.hidden_singles
+        for num in MASK_DIGITS[old ^ mask]:
+            step = 1 if mask >> (num - 1) & 1 else -1
+            for unit in UNITS_OF[idx]:
+                key = unit * 9 + num - 1
+                places[key] += step
+                if places[key] == 1:
+                    hidden.add(key)
+                else:
+                    hidden.discard(key)
+
+    def edit(self, idx, num):
+        """Set cell idx to num (0 clears it); returns the cells whose candidates may have changed.
+
+        Raises ValueError for a given (clue) cell.
+        """
+        if idx in self.givens:
+            raise ValueError("cell is a given")
+        old = self.cells[idx]
+        if old == num:
+            return [idx]
+
+        if old:
+            self._clear(idx)
+        if num:
+            self._place(idx, num)
+
+        self._set_candidates(idx, 0 if num else self._free(idx))
+        cells = self.cells
+        for peer in PEERS[idx]:
+            if cells[peer] == 0:
+                self._set_candidates(peer, self._free(peer))
+
+        # Only cells holding the old or the new digit can gain or lose a clash
+        for cell in (idx, *PEERS[idx]):
+            if cell != idx and cells[cell] not in (old, num):
+                continue
+            if cells[cell] and self._clashes(cell):
+                self.conflicts.add(cell)
+            else:
+                self.conflicts.discard(cell)
+        return [idx, *PEERS[idx]]
+
+    def hint(self):
+        """A cell that logic alone can fill, or None (also while there are conflicts).
+
+        Naked singles come first, then hidden singles; neither needs a scan
+        of the board, as both are kept up to date by edit().
+        """
+        if self.conflicts:
+            return None
+        for idx in self.naked_singles:
+            return {"row": idx // 9, "col": idx % 9, "value": MASK_DIGITS[self.candidates[idx]][0],
+                    "reason": "naked_single"}
+        for key in self.hidden_singles:
+            unit, offset = divmod(key, 9)
+            for idx in UNITS[unit]:
+                if self.candidates[idx] >> offset & 1:
+                    return {"row": idx // 9, "col": idx % 9, "value": offset + 1, "reason": "hidden_single"}
+        return None
+
+    def solved(self):
+        return self.filled == 81 and not self.conflicts
+
+    def conflict_cells(self):
+        return [_cell(idx) for idx in sorted(self.conflicts)]
+
+    def candidate_list(self, cells):
+        """[row, col, digits] for each empty cell among cells."""
+        return [[idx // 9, idx % 9, MASK_DIGITS[self.candidates[idx]]] for idx in cells if self.cells[idx] == 0]
+
+    def snapshot(self):
+        cells = self.cells
+        return {
+            "session_id": self.id,
+            "board": [cells[i * 9:i * 9 + 9] for i in range(9)],
+            "givens": [_cell(idx) for idx in sorted(self.givens)],
+            "conflicts": self.conflict_cells(),
+            "candidates": [[MASK_DIGITS[self.candidates[i * 9 + j]] for j in range(9)] for i in range(9)],
+            "solved": self.solved(),
+        }
+
+
+class SessionStore:
+    def __init__(self, max_sessions=MAX_SESSIONS, ttl=SESSION_TTL):
+        self.max_sessions = max_sessions
+        self.ttl = ttl
+        self._sessions = OrderedDict()
+        self._lock = threading.Lock()
+        self.evictions = 0
+
+    def create(self, board):
+        session = Session(uuid.uuid4().hex, board)
+        with self._lock:
+            self._evict()
+            self._sessions[session.id] = session
+        return session
+
+    def get(self, session_id):
+        with self._lock:
+            session = self._sessions.get(session_id)
+            if session is None:
+                return None
+            now = time.monotonic()
+            if now - session.last_access > self.ttl:
+                del self._sessions[session_id]
+                self.evictions += 1
+                return None
+            session.last_access = now
+            self._sessions.move_to_end(session_id)
+            return session
+
+    def delete(self, session_id):
+        with self._lock:
+            return self._sessions.pop(session_id, None) is not None
+
+    def _evict(self):
+        """Drop idle sessions (oldest first), then the least recently used until there is room."""
+        now = time.monotonic()
+        while self._sessions:
+            session_id, session = next(iter(self._sessions.items()))
+            if now - session.last_access <= self.ttl and len(self._sessions) < self.max_sessions:
+                break
+            del self._sessions[session_id]
+            self.evictions += 1
+
+    def stats(self):
+        with self._lock:
+            return {
+                "sessions": len(self._sessions),
+                "max_sessions": self.max_sessions,
+                "ttl_s": self.ttl,
+                "evictions": self.evictions,
+            }
+
+
+session_store = SessionStore()
@@ -1,110 +1,149 @@
+from arc import ArcState
+from board_state import MASK_DIGITS, MASK_SIZE
+from solver_trace import VerboseTrace
 
-import copy
+# Propagation rules (see arc.RULES) applied on top of peer elimination
+DEFAULT_RULES = ("hidden_single",)
 
-from backtracking import *
-from arc import arc
 
-
-def _find_best_empty_cell(board):
-    """Return empty cell with the fewest legal options (row, col, options)."""
+def _find_best_cell(state):
+    """Find the unassigned cell with the smallest domain."""
     best_cell = None
-    best_options = None
-
-    for i in range(9):
-        for j in range(9):
-            if board[i][j] != 0:
-                continue
-
-            options = get_possible_values(board, i, j)
-            if best_cell is None or len(options) < len(best_options):
-                best_cell = (i, j)
-                best_options = options
-                if len(best_options) == 1:
-                    return best_cell, best_options
-
-    return best_cell, best_options or []
-
-
-def _apply_arc(board, steps):
-    """Run arc consistency, append its steps, and report status."""
-    arc_board, domains, arc_steps_raw, arc_ok, arc_complete = arc(board)
-    for s in arc_steps_raw:
-        if isinstance(s, dict) and "type" in s:
-            # Already formatted (arc_inferred steps)
-            steps.append(s)
-        else:
-            # Old format (arc steps with from, to, value)
-            steps.append({"type": "arc", "from": s["from"], "to": s["to"], "value": s["value"]})
-    return arc_board, domains, arc_ok, arc_complete
+    best_size = 10
+    values, domains = state.values, state.domains
 
-
-def _find_best_cell_from_domains(board, domains):
-    """Find empty cell with smallest domain size."""
-    best_cell = None
-    best_domain = None
-    
-    for i in range(9):
-        for j in range(9):
-            if board[i][j] != 0:
-                continue
-            
-            domain = domains[i][j]
-            if len(domain) == 0:
-                continue
-                
-            if best_cell is None or len(domain) < len(best_domain):
-                best_cell = (i, j)
-                best_domain = domain
-                if len(best_domain) == 1:
-                    return best_cell, list(best_domain)
-    
-    if best_cell is None:
-        return None, []
-    return best_cell, list(best_domain)
-
-
-def _backtrack_with_steps(board, steps):
-    """Backtracking search that re-applies arc consistency each recursion."""
-    board, domains, arc_ok, arc_complete = _apply_arc(board, steps)
-    if not arc_ok:
-        return False, board
-    # if arc_complete:
-    #     return True, board
-
-    cell, options = _find_best_cell_from_domains(board, domains)
-    if cell is None:
-        return True, board
-
-    row, col = cell
-    for num in options:
-        if not is_safe(board, row, col, num):
+    for idx in range(81):
+        if values[idx] != 0:
             continue
 
-        # Save domain state before assignment (convert sets to lists for JSON serialization)
-        domain_snapshot = [[list(d) for d in domain_row] for domain_row in domains]
-
-        next_board = copy.deepcopy(board)
-        next_board[row][col] = num
-        steps.append({"type": "backtrack_assign", "cell": (row, col), "value": num})
-
-        solved, solved_board = _backtrack_with_steps(next_board, steps)
-        if solved:
-            return True, solved_board
-
-        # Revert the cell value on backtrack
-        next_board[row][col] = 0
-        steps.append({"type": "backtrack_revert", "cell": (row, col), "value": num, "domain_before": domain_snapshot})
-
-    return False, board
-
+        size = MASK_SIZE[domains[idx]]
+        if size < best_size:
+            best_cell = idx
+            best_size = size
+            if size <= 2:
+                break
+
+    return best_cell
+
+
+def _solutions(state, trace, stats=None):
+    """Backtracking search that propagates only from the newly assigned cell.
+
+    Yields each time every cell is assigned; resuming undoes that solution
+    and carries on, so the search can be paused or abandoned at any solution.
+    Domain changes are recorded on the state's trail and undone in place when
+    a branch fails, so each node costs only the changes it actually made.
+
+    Iterative: the stack holds, per depth, the branching cell, its candidate
+    values, the index of the value being tried and the trail mark to undo it.
+    """
+    idx = _find_best_cell(state)
+    if idx is None:
+        yield
+        return
+
+    cells = [0] * 81
+    values = [None] * 81
+    choice = [0] * 81
+    marks = [0] * 81
+    # Solutions found when the value at each depth was assigned (for backtracks)
+    found_at = [0] * 81
+    found = 0
+
+    depth = 0
+    cells[0] = idx
+    values[0] = MASK_DIGITS[state.domains[idx]]
+
+    while depth >= 0:
+        idx = cells[depth]
+        k = choice[depth]
+        if k:
+            # Undo every domain change made under the value tried last
+            num = values[depth][k - 1]
+            state.undo(marks[depth])
+            if trace is not None:
+                trace.revert(idx, num, state)
+            if stats is not None and found == found_at[depth]:
+                stats.backtracks += 1
+
+        if k == len(values[depth]):
+            depth -= 1
+            continue
 
-def solve(board):
-    working_board = copy.deepcopy(board)
-    steps = []
+        num = values[depth][k]
+        choice[depth] = k + 1
+        marks[depth] = state.mark()
+        if trace is not None:
+            trace.assign(idx, num)
 
-    solved, solution_board = _backtrack_with_steps(working_board, steps)
+        if stats is None:
+            ok = state.assign(idx, num) and state.propagate([idx])
+        else:
+            stats.nodes += 1
+            if stats.nodes >= stats.next_check:
+                stats.check_budget()
+            if depth >= stats.max_depth:
+                stats.max_depth = depth + 1
+            found_at[depth] = found
+            ok = state.assign(idx, num) and stats.propagate(state, [idx])
+        if not ok:
+            continue
 
-    if not solved:
-        return None, steps, False
+        idx = _find_best_cell(state)
+        if idx is None:
+            found += 1
+            yield
+            continue
 
-    return solution_board, steps, True
\ No newline at end of file
+        depth += 1
+        cells[depth] = idx
+        values[depth] = MASK_DIGITS[state.domains[idx]]
+        choice[depth] = 0
+
+
+def _backtrack_with_steps(state, trace, stats=None):
+    """Search for the first solution, leaving it assigned in state."""
+    for _ in _solutions(state, trace, stats):
+        return True
+    return False
+
+
+def _propagated_state(board, rules, trace, level, stats):
+    """ArcState for board after the initial propagation, or None on a contradiction."""
+    state = ArcState(board, trace, rules, level)
+    queue = state.assigned_cells()
+    ok = state.propagate(queue) if stats is None else stats.propagate(state, queue)
+    return state if ok else None
+
+
+def solve(board, rules=DEFAULT_RULES, trace=None, level="full", stats=None):
+    """Solve board; returns (solution or None, trace, solvable).
+
+    The trace defaults to a VerboseTrace, which is the list of step dicts.
+    With level "none" nothing is recorded and the returned trace is None.
+    If stats (a stats.SearchStats) is given, the search counters are added to
+    it, and stats.BudgetExceeded is raised once its budget runs out.
+    """
+    if level == "none":
+        trace = None
+    elif trace is None:
+        trace = VerboseTrace(domain_snapshots=level == "full")
+
+    state = _propagated_state(board, rules, trace, level, stats)
+    if state is None or not _backtrack_with_steps(state, trace, stats):
+        return None, trace, False
+
+    solution_board = [row[:] for row in board]
+    state.write_to(solution_board)
+    return solution_board, trace, True
+
+
+def iter_solutions(board, rules=DEFAULT_RULES, stats=None):
+    """Yield every solution of board as a new 9x9 list, lazily; nothing is traced."""
+    state = _propagated_state(board, rules, None, "none", stats)
+    if state is None:
+        return
+    for _ in _solutions(state, None, stats):
+        solution_board = [row[:] for row in board]
+        state.write_to(solution_board)
+        yield solution_board
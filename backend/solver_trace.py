@@ -0,0 +1,169 @@
+"""Step traces for the arc-consistency / backtracking solver.
+
+The solver reports what it does through a trace object:
+
+- removal(cell, reason, value, rule)  a value left the domain of cell
+- inferred(cell, value, rule)         a cell was forced to a single value
+- assign(cell, value)                 the search guessed a value
+- revert(cell, value, state)          the guess failed and was undone
+
+Cells are flat indexes (row * 9 + col). VerboseTrace builds the list of step
+dicts the frontend replays. CompactTrace stores five integers per step and
+has reverts point back at the assignment they undo instead of copying the
+domains, which keeps hard traces small and cheap to serialize.
+"""
+
+import base64
+import struct
+from array import array
+
+FORMATS = ("verbose", "compact", "binary")
+
+# none: no trace at all; assignments: inferences, assigns and reverts only
+# (verbose reverts without domain snapshots); full: every domain removal too.
+TRACE_LEVELS = ("none", "assignments", "full")
+
+OP_ARC = 0
+OP_INFERRED = 1
+OP_ASSIGN = 2
+OP_REVERT = 3
+OPS = ("arc", "arc_inferred", "backtrack_assign", "backtrack_revert")
+
+# Rule codes are part of the wire format, so new rules go at the end.
+# Code 0 is plain peer elimination.
+RULE_NAMES = [None, "hidden_single", "naked_pair", "hidden_pair", "pointing", "box_line",
+              "naked_triple", "hidden_triple"]
+RULE_CODES = {name: code for code, name in enumerate(RULE_NAMES) if name}
+
+# Binary record: op, cell, value, aux cell, ref (little endian, 8 bytes)
+RECORD = struct.Struct("<BBBBI")
+NO_CELL = 255
+
+
+class VerboseTrace(list):
+    """The original step format: one JSON-ready dict per step."""
+
+    def __init__(self, domain_snapshots=True):
+        super().__init__()
+        self.domain_snapshots = domain_snapshots
+
+    def removal(self, cell, reason, value, rule=None):
+        step = {"type": "arc", "from": divmod(cell, 9), "to": divmod(reason, 9), "value": value}
+        if rule:
+            step["rule"] = rule
+        self.append(step)
+
+    def inferred(self, cell, value, rule=None):
+        step = {"type": "arc_inferred", "cell": divmod(cell, 9), "value": value}
+        if rule:
+            step["rule"] = rule
+        self.append(step)
+
+    def assign(self, cell, value):
+        self.append({"type": "backtrack_assign", "cell": divmod(cell, 9), "value": value})
+
+    def revert(self, cell, value, state):
+        step = {"type": "backtrack_revert", "cell": divmod(cell, 9), "value": value}
+        if self.domain_snapshots:
+            # state has already been rolled back to where it was before the assign
+            step["domain_before"] = state.domain_lists()
+        self.append(step)
+
+    def encode(self, fmt="verbose"):
+        if fmt == "verbose":
+            return list(self)
+        raise ValueError("VerboseTrace only encodes the verbose format")
+
+
+class CompactTrace:
+    """Steps as (op, cell, value, aux, ref) integer records.
+
+    aux is the reason cell of a removal (NO_CELL otherwise). ref is the rule
+    code for removals and inferences, and for a revert the index of the
+    backtrack_assign step it undoes; the domains to restore are the ones in
+    effect just before that step.
+    """
+
+    def __init__(self):
+        self.records = array("i")
+        self._open_assigns = []
+
+    def __len__(self):
+        return len(self.records) // 5
+
+    def removal(self, cell, reason, value, rule=None):
+        self.records.extend((OP_ARC, cell, value, reason, RULE_CODES[rule] if rule else 0))
+
+    def inferred(self, cell, value, rule=None):
+        self.records.extend((OP_INFERRED, cell, value, NO_CELL, RULE_CODES[rule] if rule else 0))
+
+    def assign(self, cell, value):
+        self._open_assigns.append(len(self))
+        self.records.extend((OP_ASSIGN, cell, value, NO_CELL, 0))
+
+    def revert(self, cell, value, state):
+        self.records.extend((OP_REVERT, cell, value, NO_CELL, self._open_assigns.pop()))
+
+    def to_compact(self):
+        """Flat integer list; revert refs become the distance back to their assign."""
+        out = self.records.tolist()
+        for pos in range(0, len(out), 5):
+            if out[pos] == OP_REVERT:
+                out[pos + 4] = pos // 5 - out[pos + 4]
+        return out
+
+    def to_binary(self):
+        records = self.records
+        return b"".join(RECORD.pack(*records[pos:pos + 5]) for pos in range(0, len(records), 5))
+
+    def to_verbose(self):
+        """Expand to step dicts; reverts carry "ref" instead of "domain_before"."""
+        return self.steps(0, len(self))
+
+    def steps(self, start, stop):
+        """Step dicts for steps start..stop-1 (see to_verbose)."""
+        steps = []
+        records = self.records
+        for pos in range(start * 5, min(stop, len(self)) * 5, 5):
+            op, cell, value, aux, ref = records[pos:pos + 5]
+            step = {"type": OPS[op], "value": value}
+            if op == OP_ARC:
+                step["from"] = divmod(cell, 9)
+                step["to"] = divmod(aux, 9)
+            else:
+                step["cell"] = divmod(cell, 9)
+            if op == OP_REVERT:
+                step["ref"] = ref
+            elif ref:
+                step["rule"] = RULE_NAMES[ref]
+            steps.append(step)
+        return steps
+
+    def encode(self, fmt="compact"):
+        if fmt == "compact":
+            return self.to_compact()
+        if fmt == "binary":
+            return base64.b64encode(self.to_binary()).decode("ascii")
+        return self.to_verbose()
+
+
+def new_trace(fmt="verbose", level="full"):
+    if level == "none":
+        return None
+    if fmt == "verbose":
+        return VerboseTrace(domain_snapshots=level == "full")
+    return CompactTrace()
+
+
+def describe(fmt):
+    """Legend sent alongside compact and binary traces."""
+    if fmt == "verbose":
+        return None
+    return {
+        "fields": ["op", "cell", "value", "aux", "ref"],
+        "record_bytes": RECORD.size if fmt == "binary" else None,
+        "ops": list(OPS),
+        "rules": RULE_NAMES,
+        "no_cell": NO_CELL,
+        "revert_ref": "distance back to the assign step" if fmt == "compact" else "index of the assign step",
+    }
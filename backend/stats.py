@@ -0,0 +1,100 @@
+"""Search counters filled in by the solvers when they are given a SearchStats.
+
+A SearchStats can also carry a budget: a time limit and/or a maximum number
+of nodes. The solvers compare the node count against next_check on every
+node, and only when it is reached does check_budget() look at the clock, so
+an unlimited budget costs a single integer comparison per node. When the
+budget runs out the search raises BudgetExceeded, which carries the partial
+counters. The same check also polls an optional cancel callable, which is how
+a search running in another process is told to give up early.
+"""
+
+import math
+import time
+
+# Nodes between two clock (or cancel) checks when no node limit comes sooner
+CHECK_EVERY = 128
+
+
+class BudgetExceeded(Exception):
+    def __init__(self, reason, stats):
+        super().__init__(f"search budget exceeded ({reason})")
+        self.reason = reason
+        self.stats = stats
+
+
+class SearchStats:
+    """Counters for a single solve.
+
+    nodes: values tried on an open cell (search branches).
+    backtracks: branches that led to no solution and were undone.
+    propagations: propagation passes run (arc consistency solvers only).
+    max_depth: deepest level of nested branches.
+
+    time_limit (seconds, counted from construction) and max_nodes bound the
+    search; the same instance can be passed to several solver calls to give
+    them one shared budget. cancel, if given, is called on every budget check
+    and stops the search with reason "cancelled" once it returns True.
+    """
+
+    __slots__ = ("nodes", "backtracks", "propagations", "max_depth", "propagation_time",
+                 "deadline", "max_nodes", "next_check", "cancel")
+
+    def __init__(self, time_limit=None, max_nodes=None, cancel=None):
+        self.nodes = 0
+        self.backtracks = 0
+        self.propagations = 0
+        self.max_depth = 0
+        self.propagation_time = 0.0
+        self.deadline = time.perf_counter() + time_limit if time_limit is not None else None
+        self.max_nodes = max_nodes
+        self.cancel = cancel
+        self.next_check = math.inf
+        self._schedule_check()
+
+    def _schedule_check(self):
+        next_check = math.inf
+        if self.deadline is not None or self.cancel is not None:
+            next_check = self.nodes + CHECK_EVERY
+        if self.max_nodes is not None:
+            next_check = min(next_check, self.max_nodes + 1)
+        self.next_check = next_check
+
+    def check_budget(self):
+        """Raise BudgetExceeded if the budget is used up; called when nodes reaches next_check."""
+        if self.max_nodes is not None and self.nodes > self.max_nodes:
+            raise BudgetExceeded("nodes", self)
+        if self.deadline is not None and time.perf_counter() > self.deadline:
+            raise BudgetExceeded("time", self)
+        if self.cancel is not None and self.cancel():
+            raise BudgetExceeded("cancelled", self)
+        self._schedule_check()
+
+    def propagate(self, state, queue):
+        """Run state.propagate(queue), counting the pass and its time."""
+        start = time.perf_counter()
+        ok = state.propagate(queue)
+        self.propagation_time += time.perf_counter() - start
+        self.propagations += 1
+        return ok
+
+    def add(self, other):
+        self.nodes += other.nodes
+        self.backtracks += other.backtracks
+        self.propagations += other.propagations
+        self.max_depth = max(self.max_depth, other.max_depth)
+        self.propagation_time += other.propagation_time
+
+    def to_dict(self, time_taken_ms=None):
+        """Counters as a dict; search_ms is time_taken_ms minus propagation time."""
+        propagation_ms = self.propagation_time * 1000
+        result = {
+            "nodes": self.nodes,
+            "backtracks": self.backtracks,
+            "propagations": self.propagations,
+            "max_depth": self.max_depth,
+            "propagation_ms": propagation_ms,
+        }
+        if time_taken_ms is not None:
+            result["search_ms"] = max(0.0, time_taken_ms - propagation_ms)
+        return result
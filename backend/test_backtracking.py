@@ -0,0 +1,123 @@
+import copy
+import backtracking
+import dlx
+import solver
+from board_state import BoardState
+from stats import BudgetExceeded, SearchStats
+from validation import is_board_valid
+
+PUZZLE = [
+	[5, 3, 0, 0, 7, 0, 0, 0, 0],
+	[6, 0, 0, 1, 9, 5, 0, 0, 0],
+	[0, 9, 8, 0, 0, 0, 0, 6, 0],
+	[8, 0, 0, 0, 6, 0, 0, 0, 3],
+	[4, 0, 0, 8, 0, 3, 0, 0, 1],
+	[7, 0, 0, 0, 2, 0, 0, 0, 6],
+	[0, 6, 0, 0, 0, 0, 2, 8, 0],
+	[0, 0, 0, 4, 1, 9, 0, 0, 5],
+	[0, 0, 0, 0, 8, 0, 0, 7, 9]
+]
+
+def is_solution_of(solution, puzzle):
+	for i in range(9):
+		for j in range(9):
+			if solution[i][j] == 0:
+				return False
+			if puzzle[i][j] != 0 and puzzle[i][j] != solution[i][j]:
+				return False
+	return is_board_valid(solution)
+
+def test_board_state_masks():
+	state = BoardState(PUZZLE)
+	for idx in range(81):
+		i, j = divmod(idx, 9)
+		if PUZZLE[i][j] != 0:
+			continue
+		expected = backtracking.get_possible_values(PUZZLE, i, j)
+		mask = state.candidates(idx)
+		assert [d for d in range(1, 10) if mask >> (d - 1) & 1] == expected
+	assert state.to_board() == PUZZLE
+
+def test_solve_and_count():
+	solution = backtracking.get_solution(copy.deepcopy(PUZZLE))
+	assert is_solution_of(solution, PUZZLE)
+	assert backtracking.solvable(copy.deepcopy(PUZZLE))
+	assert backtracking.get_number_of_solutions(copy.deepcopy(PUZZLE)) == 1
+
+	board = copy.deepcopy(PUZZLE)
+	board[0][0] = 0
+	board[0][1] = 0
+	board[1][0] = 0
+	assert backtracking.get_number_of_solutions(board, 0, 0, 5) >= 1
+	assert board[0][0] == 0, "counting must leave the board unchanged"
+
+def test_unsolvable():
+	board = [[0] * 9 for _ in range(9)]
+	board[0] = [0, 1, 2, 3, 4, 5, 6, 7, 8]
+	board[4][0] = 9
+	assert is_board_valid(board)
+	assert not backtracking.solvable(copy.deepcopy(board))
+	assert backtracking.get_solution(copy.deepcopy(board)) is None
+	assert backtracking.get_number_of_solutions(copy.deepcopy(board)) == 0
+
+def test_fill_board():
+	board = [[0] * 9 for _ in range(9)]
+	assert backtracking.fill_board(board)
+	assert is_solution_of(board, [[0] * 9 for _ in range(9)])
+
+def test_strategies():
+	unsolvable = [[0] * 9 for _ in range(9)]
+	unsolvable[0] = [0, 1, 2, 3, 4, 5, 6, 7, 8]
+	unsolvable[4][0] = 9
+	for strategy in backtracking.STRATEGIES:
+		solution, nodes = backtracking.get_solution_with_stats(PUZZLE, strategy)
+		assert is_solution_of(solution, PUZZLE), strategy
+		assert nodes > 0
+		assert backtracking.get_solution(copy.deepcopy(PUZZLE), strategy=strategy) == solution
+		assert backtracking.get_solution_with_stats(unsolvable, strategy)[0] is None
+
+def test_strategy_budget_spans_restarts():
+	stats = SearchStats()
+	solution, nodes = backtracking.get_solution_with_stats(PUZZLE, 'random_restarts', stats)
+	assert is_solution_of(solution, PUZZLE) and stats.nodes == nodes
+	for strategy in ('mrv_lcv', 'random_restarts'):
+		try:
+			backtracking.get_solution_with_stats([[0] * 9 for _ in range(9)], strategy, SearchStats(max_nodes=50))
+			assert False, "budget not enforced"
+		except BudgetExceeded as exc:
+			assert exc.reason == 'nodes' and exc.stats.nodes > 50
+
+def test_iter_solutions():
+	board = copy.deepcopy(PUZZLE)
+	board[0] = [0] * 9
+	board[3] = [0] * 9
+	count = dlx.get_number_of_solutions(board, max_solutions=1000)
+	assert count > 1
+	for iter_solutions in (backtracking.iter_solutions, solver.iter_solutions, dlx.iter_solutions):
+		solutions = list(iter_solutions(board))
+		assert len(solutions) == len({tuple(map(tuple, solution)) for solution in solutions}) == count
+		assert all(is_solution_of(solution, board) for solution in solutions)
+	empty = [[0] * 9 for _ in range(9)]
+	first = next(backtracking.iter_solutions(empty))
+	assert is_solution_of(first, empty) and empty == [[0] * 9 for _ in range(9)]
+
+def test_count_solutions_restores_state():
+	state = BoardState([[0] * 9 for _ in range(9)])
+	assert backtracking.count_solutions(state, 5) == 5
+	assert state.cells == [0] * 81 and state.rows == [0] * 9 and state.boxes == [0] * 9
+
+def test_analyze():
+	result = backtracking.analyze(PUZZLE)
+	assert result['solvable'] and result['number_of_solutions'] == 1
+	assert is_solution_of(result['solution'], PUZZLE)
+	board = copy.deepcopy(PUZZLE)
+	board[0] = [0] * 9
+	assert backtracking.analyze(board, max_solutions=10)['number_of_solutions'] == 2
+	# The 9 clashes with the first row, leaving (0, 0) without candidates
+	unsolvable = [[0] * 9 for _ in range(9)]
+	unsolvable[0] = [0, 1, 2, 3, 4, 5, 6, 7, 8]
+	unsolvable[4][0] = 9
+	stats = SearchStats()
+	result = backtracking.analyze(unsolvable, stats=stats)
+	assert not result['solvable'] and result['solution'] is None
+	assert stats.nodes == 0
@@ -0,0 +1,54 @@
+import copy
+import batch
+import dlx
+import main
+from test_backtracking import PUZZLE, is_solution_of
+
+EMPTY = [[0] * 9 for _ in range(9)]
+
+def unsolvable():
+	board = copy.deepcopy(EMPTY)
+	board[0] = [0, 1, 2, 3, 4, 5, 6, 7, 8]
+	board[4][0] = 9
+	return board
+
+def mixed_boards():
+	solved = dlx.get_solution(PUZZLE)
+	return [PUZZLE, unsolvable(), solved, EMPTY] * 5
+
+def test_solve_batch_keeps_input_order():
+	boards = mixed_boards()
+	for workers in (1, 2):
+		results, stats = batch.solve_batch(boards, "dlx", workers)
+		assert [result["index"] for result in results] == list(range(len(boards)))
+		for board, result in zip(boards, results):
+			if board is boards[1]:
+				assert result["solvable"] is False and result["solution"] is None
+			else:
+				assert is_solution_of(result["solution"], board)
+		assert stats["count"] == len(boards)
+		assert stats["solved"] == 15 and stats["budget_exceeded"] == 0
+
+def test_budget_is_per_board():
+	solved = dlx.get_solution(PUZZLE)
+	boards = [solved, EMPTY, solved, EMPTY]
+	results, stats = batch.solve_batch(boards, "backtracking", 2, max_nodes=10)
+	assert [result.get("budget_exceeded") for result in results] == [None, "nodes", None, "nodes"]
+	assert results[0]["solution"] == solved and results[1]["solvable"] is None
+	assert stats["solved"] == 2 and stats["budget_exceeded"] == 2
+
+def test_iter_solve_batch_streams_every_board():
+	boards = mixed_boards()
+	indexes = []
+	for result in batch.iter_solve_batch(boards, "dlx", 2):
+		indexes.append(result["index"])
+		assert "time_taken_ms" in result and "stats" in result
+	assert sorted(indexes) == list(range(len(boards)))
+
+def test_batch_endpoints_reject_unknown_solvers():
+	client = main.app.test_client()
+	for path in ('/api/solve/batch', '/api/solve/batch/stream'):
+		for solver_name in (['dlx'], {'name': 'dlx'}, 'simplex'):
+			response = client.post(path, json={'boards': [PUZZLE], 'solver': solver_name})
+			assert response.status_code == 400, (path, solver_name)
+	assert client.post('/api/solve/batch', json={'boards': [PUZZLE], 'workers': 1}).status_code == 200
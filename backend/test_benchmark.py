@@ -0,0 +1,29 @@
+import benchmark
+import dlx
+from corpus import load
+
+def test_corpus_categories():
+	corpus = load()
+	for category in ("easy", "hard", "seventeen"):
+		for board in corpus[category]:
+			assert dlx.get_number_of_solutions(board) == 1
+	for board in corpus["unsolvable"]:
+		assert dlx.get_number_of_solutions(board) == 0
+
+def test_compare_flags_regressions():
+	summary = {"timeouts": 0, "latency_ms": {"p50": 10.0, "p90": 20.0, "p99": 30.0}, "nodes": {"mean": 100, "max": 200}}
+	baseline = {"results": {"solver.solve": {"hard": summary}}}
+	slower = dict(summary, latency_ms={"p50": 10.5, "p90": 40.0, "p99": 30.0}, nodes={"mean": 300, "max": 600})
+	current = {"results": {"solver.solve": {"hard": slower}}}
+	assert benchmark.compare(baseline, baseline) == []
+	messages = benchmark.compare(baseline, current, threshold=0.25)
+	assert len(messages) == 2
+	assert "p90" in messages[0] and "nodes" in messages[1]
+
+def test_percentile_nearest_rank():
+	assert benchmark.percentile(range(100), 0.99) == 98
+	assert benchmark.percentile(range(100), 0.5) == 49
+	assert benchmark.percentile([6, 5, 4, 3, 2, 1], 0.5) == 3
+	assert benchmark.percentile([1, 2, 3], 0.0) == 1
+	assert benchmark.percentile([1, 2, 3], 1.0) == 3
+	assert benchmark.percentile([7], 0.9) == 7
@@ -0,0 +1,26 @@
+import board_format
+from test_backtracking import PUZZLE
+
+def test_string_and_packed_round_trip():
+	text = board_format.to_string(PUZZLE)
+	assert text.startswith('530070000600195000')
+	assert board_format.from_string(text) == PUZZLE
+	assert board_format.from_string(text.replace('0', '.').encode()) == PUZZLE
+	packed = board_format.pack(PUZZLE)
+	assert len(packed) == board_format.PACKED_SIZE and packed[0] == 0x53
+	assert board_format.unpack(packed) == PUZZLE
+
+def test_malformed_boards():
+	text = board_format.to_string(PUZZLE)
+	for bad in (text[:80], text + '1', 'x' + text[1:], 'é' + text[1:]):
+		assert board_format.from_string(bad) is None
+	packed = board_format.pack(PUZZLE)
+	assert board_format.unpack(b'\xa0' + packed[1:]) is None
+	assert board_format.unpack(packed[:-1] + b'\x01') is None
+	assert board_format.parse_lines((text + '\n\n' + text[:10] + '\n').encode()) == [PUZZLE, None]
+	assert board_format.parse_packed(packed * 2) == [PUZZLE, PUZZLE]
+	try:
+		board_format.parse_packed(packed[:-1])
+		assert False, "partial record accepted"
+	except ValueError:
+		pass
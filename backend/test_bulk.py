@@ -0,0 +1,60 @@
+import random
+import numpy as np
+import bulk
+from board_state import BoardState
+from generate_board import generate_puzzle
+from validation import is_board_valid
+
+def random_boards(count, rng):
+	boards = []
+	for _ in range(count):
+		board = generate_puzzle(rng.choice([25, 40, 60]))
+		for _ in range(rng.randint(0, 3)):
+			board[rng.randrange(9)][rng.randrange(9)] = rng.randint(0, 9)
+		boards.append(board)
+	return boards
+
+def test_validate_matches_python():
+	rng = random.Random(7)
+	boards = random_boards(40, rng)
+	result = bulk.validate(boards, candidates=True)
+	for board, valid, masks in zip(boards, result["valid"], result["candidates"]):
+		assert bool(valid) == is_board_valid(board)
+		state = BoardState(board)
+		for i in range(9):
+			for j in range(9):
+				expected = state.candidates(i * 9 + j) if board[i][j] == 0 else 0
+				assert masks[i][j] == expected
+	assert any(result["valid"]) and not all(result["valid"])
+
+def test_duplicates_and_range():
+	board = [[0] * 9 for _ in range(9)]
+	board[0][0] = board[0][8] = 5
+	board[4][4] = 10
+	result = bulk.validate([board, [[0] * 9 for _ in range(9)]])
+	assert result["valid"].tolist() == [False, True]
+	assert result["in_range"].tolist() == [False, True]
+	assert np.argwhere(result["duplicates"][0]).tolist() == [[0, 0], [0, 8]]
+	try:
+		bulk.validate([[[0] * 9] * 8])
+		assert False, "wrong shape accepted"
+	except ValueError:
+		pass
+
+def test_parse_lines():
+	lines = [b"." * 81, b"1" * 80, b"x" + b"0" * 80]
+	array, good, bad = bulk.parse_lines(lines)
+	assert good.tolist() == [0, 2] and bad.tolist() == [1]
+	result = bulk.validate(array)
+	assert result["valid"].tolist() == [True, False]
+
+def test_to_dicts():
+	board = [[0] * 9 for _ in range(9)]
+	board[0][0] = board[1][1] = 3
+	entries = bulk.to_dicts(bulk.validate([board], candidates=True))
+	assert entries == [{
+		"valid": False,
+		"duplicates": [[0, 0], [1, 1]],
+		"dead_end": False,
+		"candidates": bulk.candidate_masks(bulk.to_array([board])[0])[0].tolist(),
+	}]
@@ -0,0 +1,21 @@
+import gzip
+import io
+import bulk_solve
+import corpus
+
+def test_solve_file_keeps_order(tmp_path):
+	easy = corpus.CORPUS['easy']
+	lines = easy + ['12', '11' + '0' * 79, corpus.CORPUS['unsolvable'][0]] + easy
+	path = tmp_path / 'puzzles.gz'
+	with gzip.open(path, 'wt') as f:
+		f.write('\n'.join(lines) + '\n\n')
+
+	for workers in (1, 2):
+		out = io.BytesIO()
+		summary = bulk_solve.solve_file(str(path), out, workers=workers, chunk=4)
+		results = out.getvalue().decode().splitlines()
+		assert len(results) == summary['puzzles'] == len(lines)
+		assert results[len(easy):len(easy) + 3] == ['malformed', 'invalid', 'unsolvable']
+		for puzzle, result in zip(easy + easy, results[:len(easy)] + results[len(easy) + 3:]):
+			assert len(result) == 81 and all(p in '0' + s for p, s in zip(puzzle, result))
+		assert summary['solved'] == 2 * len(easy) and summary['malformed'] == 1
@@ -0,0 +1,80 @@
+import random
+import backtracking
+import cache
+import dlx
+from corpus import load
+from test_backtracking import PUZZLE, is_solution_of
+
+def transform(board, rng):
+	"""Apply a random sudoku symmetry: relabel, permute bands/rows/stacks/cols, transpose."""
+	digits = list(range(1, 10))
+	rng.shuffle(digits)
+	relabel = [0] + digits
+	bands = rng.sample(range(3), 3)
+	stacks = rng.sample(range(3), 3)
+	rows = [band * 3 + i for band in bands for i in rng.sample(range(3), 3)]
+	cols = [stack * 3 + j for stack in stacks for j in rng.sample(range(3), 3)]
+	result = [[relabel[board[i][j]] for j in cols] for i in rows]
+	if rng.random() < 0.5:
+		result = [[result[i][j] for i in range(9)] for j in range(9)]
+	return result
+
+def test_canonical_round_trip():
+	rng = random.Random(7)
+	for _ in range(20):
+		board = transform(PUZZLE, rng)
+		key, t = cache.canonical_form(board)
+		canonical = cache.to_canonical(board, t)
+		assert "".join(str(v) for row in canonical for v in row) == key
+		assert cache.from_canonical(canonical, t) == board
+
+def test_cached_solution_maps_back():
+	rng = random.Random(3)
+	cache.solution_cache.clear()
+	solution, hit = cache.get_solution(PUZZLE, dlx.get_solution)
+	assert not hit and is_solution_of(solution, PUZZLE)
+
+	for _ in range(20):
+		board = transform(PUZZLE, rng)
+		solution, hit = cache.get_solution(board, dlx.get_solution)
+		assert hit and is_solution_of(solution, board)
+
+def test_canonical_form_ignores_symmetry():
+	rng = random.Random(5)
+	corpus = load()
+	for board in corpus['hard'] + corpus['seventeen'] + corpus['unsolvable']:
+		key = cache.canonical_form(board)[0]
+		for _ in range(20):
+			assert cache.canonical_form(transform(board, rng))[0] == key
+
+def test_solution_variants_do_not_share_entries():
+	cache.solution_cache.clear()
+	assert not cache.get_solution(PUZZLE, dlx.get_solution, 'dlx')[1]
+	assert not cache.get_solution(PUZZLE, dlx.get_solution, ('backtracking', 'mrv'))[1]
+	assert cache.get_solution(PUZZLE, dlx.get_solution, 'dlx')[1]
+
+def test_cached_analysis_maps_solution_back():
+	rng = random.Random(4)
+	cache.solution_cache.clear()
+	result, hit = cache.get_analysis(PUZZLE, backtracking.analyze)
+	assert not hit and is_solution_of(result['solution'], PUZZLE)
+	for _ in range(10):
+		board = transform(PUZZLE, rng)
+		result, hit = cache.get_analysis(board, backtracking.analyze)
+		assert result['number_of_solutions'] == 1
+		assert is_solution_of(result['solution'], board)
+
+def test_lru_eviction_and_ttl():
+	lru = cache.LRUCache(max_size=2, ttl=60)
+	lru.put('a', 1)
+	lru.put('b', 2)
+	assert lru.get('a') == 1
+	lru.put('c', 3)
+	assert lru.get('b') is None
+	assert lru.get('a') == 1 and lru.get('c') == 3
+	assert lru.stats()['evictions'] == 1
+
+	expired = cache.LRUCache(max_size=2, ttl=-1)
+	expired.put('a', 1)
+	assert expired.get('a') is None
+	assert expired.stats()['expirations'] == 1
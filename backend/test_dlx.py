@@ -0,0 +1,37 @@
+import dlx
+import backtracking
+from test_backtracking import PUZZLE, is_solution_of
+
+HARD_17 = "000000010400000000020000000000050407008000300001090000300400200050100000000806000"
+
+def parse(line):
+	return [[int(line[i * 9 + j]) for j in range(9)] for i in range(9)]
+
+def test_dlx_solves():
+	solution = dlx.get_solution(PUZZLE)
+	assert is_solution_of(solution, PUZZLE)
+	assert PUZZLE[0][2] == 0, "the input board must not be modified"
+
+	board = parse(HARD_17)
+	assert is_solution_of(dlx.get_solution(board), board)
+
+def test_dlx_counting():
+	assert dlx.get_number_of_solutions(PUZZLE) == 1
+	empty = [[0] * 9 for _ in range(9)]
+	assert dlx.get_number_of_solutions(empty, 50) == 50
+
+	board = [row[:] for row in PUZZLE]
+	board[0][0] = 0
+	board[0][1] = 0
+	board[4][4] = 0
+	assert dlx.get_number_of_solutions(board, 100) == backtracking.get_number_of_solutions(board, 0, 0, 100)
+
+def test_dlx_unsolvable():
+	board = [[0] * 9 for _ in range(9)]
+	board[0] = [0, 1, 2, 3, 4, 5, 6, 7, 8]
+	board[4][0] = 9
+	assert dlx.get_solution(board) is None
+	assert dlx.get_number_of_solutions(board) == 0
+
+	board[0][1] = 2
+	assert dlx.get_solution(board) is None
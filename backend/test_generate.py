@@ -1,5 +1,6 @@
 import time
 from generate_board import generate_puzzle, EASY, MEDIUM, HARD
+from grading import BANDS, generate_graded, grade
 
 def test_generate_n_boards(n=5, max_time_per_board=10):
 	print(f"\nGenerating {n} boards with max time {max_time_per_board}s per board...")
@@ -28,5 +29,19 @@ def test_generate_n_boards(n=5, max_time_per_board=10):
 	
 	print(f"✓ All {n} boards generated successfully!\n")
 
+def test_generate_graded():
+	hits = 0
+	for name, (low, high) in BANDS.items():
+		board, result, in_band = generate_graded(low, high, time_budget=5.0)
+		assert result['solvable'], f"{name} puzzle is not solvable"
+		if in_band:
+			assert low <= result['score'] <= high, f"{name} score {result['score']} outside band"
+			assert grade(board)['score'] == result['score']
+			hits += 1
+		else:
+			assert not low <= result['score'] <= high, f"{name} score {result['score']} is in band but not reported"
+	# The easy band is reached well within the budget, so a miss everywhere means the generator is broken
+	assert hits > 0, "no band was hit"
+
 if __name__ == '__main__':
 	test_generate_n_boards(n=5, max_time_per_board=10)
@@ -0,0 +1,38 @@
+import copy
+import backtracking
+import parallel
+from job_pool import JobPool
+from stats import BudgetExceeded, SearchStats
+from test_backtracking import PUZZLE, is_solution_of
+
+def test_parallel_count_matches():
+	board = copy.deepcopy(PUZZLE)
+	for row in (0, 3, 5):
+		board[row] = [0] * 9
+	pool = JobPool(3)
+	try:
+		stats = SearchStats()
+		result = parallel.analyze(board, 10 ** 6, stats, pool)
+		assert result['number_of_solutions'] == backtracking.analyze(board, 10 ** 6)['number_of_solutions']
+		assert is_solution_of(result['solution'], board)
+		assert stats.nodes > 0
+		assert parallel.get_number_of_solutions(PUZZLE, pool=pool) == 1
+		assert parallel.get_number_of_solutions(board, 5, pool=pool) == 5
+		try:
+			parallel.analyze(board, 10 ** 6, SearchStats(max_nodes=100), pool)
+			assert False, "budget not enforced"
+		except BudgetExceeded as exc:
+			assert exc.reason == "nodes"
+	finally:
+		pool.close()
+
+def test_split_survives_flag_reset(monkeypatch):
+	# The flag goes back to RUN right after it stopped the search: the task must still split
+	flags = iter([parallel.SPLIT])
+	monkeypatch.setattr(parallel, 'job_flag', lambda slot: next(flags, parallel.RUN))
+	board = copy.deepcopy(PUZZLE)
+	for row in (0, 3, 5):
+		board[row] = [0] * 9
+	result = parallel._search(0, board, [], 10 ** 6, None, None)
+	assert result['budget_exceeded'] is None
+	assert result['branches']
@@ -0,0 +1,33 @@
+import time
+import dlx
+import portfolio
+from job_pool import RUN
+from portfolio import Portfolio
+from test_dlx import HARD_17, parse
+
+def test_portfolio_race():
+	board = parse(HARD_17)
+	racer = Portfolio(workers=2)
+	result = racer.solve(board, engines=("dlx", "backtracking"))
+	assert result["engine"] in ("dlx", "backtracking")
+	assert result["solution"] == dlx.get_solution(board)
+	assert result["stats"]["nodes"] > 0
+
+	result = racer.solve(board, engines=("backtracking", "dlx"), max_nodes=5)
+	assert result["solvable"] is None and result["budget_exceeded"] == "nodes"
+	assert result["search_stats"].nodes > 5
+
+	# The losing engines stop and hand their cancel slot back
+	deadline = time.time() + 10
+	while not racer.pool.idle() and time.time() < deadline:
+		time.sleep(0.01)
+	assert racer.pool.idle()
+	racer.close()
+
+def test_deadline_counts_queued_time(monkeypatch):
+	monkeypatch.setattr(portfolio, 'job_flag', lambda slot: RUN)
+	board = parse(HARD_17)
+	# A task picked up after the race's deadline gives up without searching
+	assert portfolio._run(0, "dlx", board, time.time() - 1, None)["budget_exceeded"] == "time"
+	result = portfolio._run(0, "dlx", board, time.time() + 10, None)
+	assert result["solution"] == dlx.get_solution(board) and result["engine"] == "dlx"
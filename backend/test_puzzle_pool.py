@@ -0,0 +1,49 @@
+import json
+import time
+import puzzle_pool
+from generate_board import generate_puzzle, EASY, HARD
+from puzzle_pool import PuzzlePool
+
+def stored(path):
+	with open(path) as f:
+		return json.load(f)
+
+def test_pop_counters_and_fallback(tmp_path):
+	pool = PuzzlePool(difficulties=(EASY, HARD), path=str(tmp_path / 'pool.json'), low_water=0)
+	first = generate_puzzle(EASY)
+	pool.pools[EASY].append(first)
+	assert pool.pop(EASY) == (first, True)
+	board, from_pool = pool.pop(EASY, time_budget=1.0)
+	assert not from_pool and sum(1 for row in board for cell in row if cell) >= EASY
+	stats = pool.stats()
+	assert stats['served'] == {EASY: 1, HARD: 0}
+	assert stats['sync_fallbacks'] == {EASY: 1, HARD: 0}
+
+def test_save_and_load(tmp_path):
+	path = str(tmp_path / 'pool.json')
+	pool = PuzzlePool(difficulties=(EASY,), path=path, depth=3, low_water=0)
+	boards = [generate_puzzle(EASY) for _ in range(4)]
+	pool.pools[EASY].extend(boards)
+	pool._save()
+	# Loading keeps at most depth puzzles per pool
+	assert list(PuzzlePool(difficulties=(EASY,), path=path, depth=3).pools[EASY]) == boards[:3]
+	assert list(PuzzlePool(difficulties=(EASY,), path=str(tmp_path / 'missing.json')).pools[EASY]) == []
+
+def test_served_puzzles_are_saved(tmp_path, monkeypatch):
+	monkeypatch.setattr(puzzle_pool, 'SAVE_INTERVAL', 0.05)
+	path = str(tmp_path / 'pool.json')
+	boards = [generate_puzzle(EASY) for _ in range(2)]
+	with open(path, 'w') as f:
+		json.dump({str(EASY): boards}, f)
+
+	pool = PuzzlePool(difficulties=(EASY,), path=path, low_water=0)
+	pool.start()
+	try:
+		assert pool.pop(EASY) == (boards[0], True)
+		deadline = time.monotonic() + 5
+		while stored(path)[str(EASY)] != boards[1:] and time.monotonic() < deadline:
+			time.sleep(0.01)
+	finally:
+		pool.stop()
+	# A restart does not serve the popped puzzle again
+	assert list(PuzzlePool(difficulties=(EASY,), path=path).pools[EASY]) == boards[1:]
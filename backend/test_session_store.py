@@ -0,0 +1,43 @@
+import copy
+import time
+from session_store import Session, SessionStore
+from test_backtracking import PUZZLE
+
+def test_session_edits():
+	session = Session('s', PUZZLE)
+	# (0, 2) can only be 1, 2 or 4
+	assert session.candidate_list([2]) == [[0, 2, [1, 2, 4]]]
+	changed = session.edit(2, 5)
+	assert session.conflict_cells() == [[0, 0], [0, 2]]
+	assert [0, 3, [2, 6]] in session.candidate_list(changed)
+	assert session.hint() is None
+	try:
+		session.edit(0, 1)
+		assert False, "given cell changed"
+	except ValueError:
+		pass
+
+	session.edit(2, 0)
+	assert session.conflict_cells() == []
+	board = copy.deepcopy(PUZZLE)
+	for _ in range(81):
+		hint = session.hint()
+		if hint is None:
+			break
+		session.edit(hint['row'] * 9 + hint['col'], hint['value'])
+		board[hint['row']][hint['col']] = hint['value']
+	assert session.solved()
+	assert session.snapshot()['board'] == board
+
+def test_session_store_eviction():
+	store = SessionStore(max_sessions=2, ttl=60)
+	first = store.create(PUZZLE)
+	second = store.create(PUZZLE)
+	assert store.get(first.id) is first
+	store.create(PUZZLE)
+	# second was the least recently used
+	assert store.get(second.id) is None and store.get(first.id) is first
+	store.ttl = 0
+	time.sleep(0.01)
+	assert store.get(first.id) is None
+	assert store.stats()['evictions'] == 2
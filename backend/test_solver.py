@@ -0,0 +1,137 @@
+import base64
+import copy
+import backtracking
+import dlx
+import solver
+from arc import arc, RULES
+from solver_trace import CompactTrace, RECORD
+from stats import CHECK_EVERY, BudgetExceeded, SearchStats
+from test_backtracking import PUZZLE, is_solution_of
+from test_dlx import HARD_17, parse
+
+def replay_domains(board, steps):
+	"""Rebuild the domains the way the frontend does from the step stream."""
+	domains = {(i, j): set(range(1, 10)) for i in range(9) for j in range(9) if board[i][j] == 0}
+	for step in steps:
+		if step['type'] == 'arc':
+			if step['from'] in domains:
+				domains[step['from']].discard(step['value'])
+		elif step['type'] in ('arc_inferred', 'backtrack_assign'):
+			domains[step['cell']] = {step['value']}
+		elif step['type'] == 'backtrack_revert':
+			for i in range(9):
+				for j in range(9):
+					domains[(i, j)] = set(step['domain_before'][i][j])
+	return domains
+
+def test_arc_inference():
+	board = copy.deepcopy(PUZZLE)
+	result_board, domains, steps, ok, complete = arc(board)
+	assert ok
+	for i in range(9):
+		for j in range(9):
+			if result_board[i][j] != 0:
+				assert domains[i][j] == {result_board[i][j]}
+	assert any(step['type'] == 'arc_inferred' for step in steps)
+
+def test_solver_solves():
+	for board in (PUZZLE, parse(HARD_17)):
+		solution, steps, solvable = solver.solve(copy.deepcopy(board))
+		assert solvable
+		assert is_solution_of(solution, board)
+		final = replay_domains(board, steps)
+		for (i, j), domain in final.items():
+			assert domain == {solution[i][j]}
+
+def test_solver_unsolvable():
+	board = [[0] * 9 for _ in range(9)]
+	board[0] = [0, 1, 2, 3, 4, 5, 6, 7, 8]
+	board[4][0] = 9
+	solution, steps, solvable = solver.solve(board)
+	assert solution is None and not solvable
+
+def test_solver_rules():
+	board = parse(HARD_17)
+	reference = solver.solve(copy.deepcopy(board), ())[0]
+	for rule in RULES:
+		solution, steps, solvable = solver.solve(copy.deepcopy(board), ("hidden_single", rule))
+		assert solution == reference
+		for step in steps:
+			if 'rule' in step:
+				assert step['rule'] in RULES
+	solution, steps, solvable = solver.solve(copy.deepcopy(board), tuple(RULES))
+	assert solution == reference
+	assert any(step.get('rule') == 'hidden_single' for step in steps)
+
+def test_compact_trace_matches_verbose():
+	board = parse(HARD_17)
+	solution, verbose, solvable = solver.solve(copy.deepcopy(board), ())
+	solution_compact, compact, solvable_compact = solver.solve(copy.deepcopy(board), (), CompactTrace())
+	assert solution_compact == solution and solvable_compact
+	assert len(compact) == len(verbose)
+
+	expanded = compact.to_verbose()
+	for step, original in zip(expanded, verbose):
+		assert step['type'] == original['type']
+		if step['type'] == 'backtrack_revert':
+			assert expanded[step['ref']]['type'] == 'backtrack_assign'
+			assert expanded[step['ref']]['cell'] == original['cell']
+		else:
+			assert step == original
+
+	flat = compact.encode('compact')
+	assert len(flat) == 5 * len(compact)
+	assert len(base64.b64decode(compact.encode('binary'))) == RECORD.size * len(compact)
+
+def test_trace_levels():
+	board = parse(HARD_17)
+	solution, full, solvable = solver.solve(copy.deepcopy(board), ())
+	solution_none, none, solvable_none = solver.solve(copy.deepcopy(board), (), level="none")
+	assert none is None and solution_none == solution
+
+	solution_assign, assignments, _ = solver.solve(copy.deepcopy(board), (), level="assignments")
+	assert solution_assign == solution
+	expected = [step for step in full if step['type'] != 'arc']
+	assert len(assignments) == len(expected)
+	assert all('domain_before' not in step for step in assignments)
+
+def test_search_stats():
+	for solve in (
+		lambda board, stats: backtracking.get_solution(board, stats=stats),
+		lambda board, stats: dlx.get_solution(board, stats),
+	):
+		stats = SearchStats()
+		assert is_solution_of(solve(copy.deepcopy(PUZZLE), stats), PUZZLE)
+		assert stats.nodes >= stats.max_depth > 0
+		assert stats.nodes > stats.backtracks
+	stats = SearchStats()
+	solution, trace, solvable = solver.solve(parse(HARD_17), rules=(), level="none", stats=stats)
+	assert solvable and stats.nodes >= stats.max_depth > 0
+	assert 1 <= stats.propagations <= stats.nodes + 1
+	assert stats.to_dict(1000.0)["search_ms"] <= 1000.0
+
+def test_search_budget():
+	board = parse(HARD_17)
+	for solve in (
+		lambda stats: solver.solve(copy.deepcopy(board), rules=(), level="none", stats=stats),
+		lambda stats: backtracking.get_number_of_solutions(copy.deepcopy(board), stats=stats),
+		lambda stats: dlx.get_number_of_solutions(board, stats=stats),
+	):
+		stats = SearchStats(max_nodes=5)
+		try:
+			solve(stats)
+			assert False, "budget not enforced"
+		except BudgetExceeded as exc:
+			assert exc.reason == "nodes" and exc.stats.nodes == 6
+	stats = SearchStats(time_limit=0.01)
+	try:
+		backtracking.get_number_of_solutions(copy.deepcopy(board), stats=stats)
+		assert False, "budget not enforced"
+	except BudgetExceeded as exc:
+		assert exc.reason == "time"
+	stats = SearchStats(cancel=lambda: stats.nodes > 1000)
+	try:
+		dlx.get_number_of_solutions([[0] * 9 for _ in range(9)], max_solutions=10 ** 6, stats=stats)
+		assert False, "cancel not polled"
+	except BudgetExceeded as exc:
+		assert exc.reason == "cancelled" and exc.stats.nodes <= 1000 + CHECK_EVERY
@@ -0,0 +1,85 @@
+import solver
+from corpus import load
+from test_backtracking import PUZZLE
+from trace_store import StoredTrace, TraceStore
+
+RULES = solver.DEFAULT_RULES
+
+def finished(store, board=PUZZLE):
+	trace_id = store.start(board, RULES)
+	entry = store.get(trace_id)
+	while not entry.trace.done:
+		entry.trace.wait_for(len(entry.trace), 1.0)
+	return trace_id
+
+def test_paging_and_stream():
+	store = TraceStore()
+	trace_id = finished(store)
+	entry = store.get(trace_id)
+	everything = entry.trace.steps(0, len(entry.trace))
+	assert len(everything) > 20
+	first, _ = store.steps(trace_id, 0, 10)
+	second, _ = store.steps(trace_id, 10, 10)
+	assert first + second == everything[:20]
+	assert store.steps(trace_id, len(everything), 10)[0] == []
+	assert list(store.stream(entry)) == everything
+	assert list(store.stream(entry, 5)) == everything[5:]
+	assert store.steps('missing', 0, 10) == (None, None)
+
+def test_evicts_least_recently_used():
+	store = TraceStore(max_traces=2)
+	a = finished(store)
+	b = finished(store)
+	store.get(a)
+	c = finished(store)
+	assert store.get(b) is None
+	assert store.get(a) is not None and store.get(c) is not None
+	assert store.stats()['evictions'] == 1
+
+def test_ttl_expiry():
+	store = TraceStore(ttl=60)
+	a = finished(store)
+	store.get(a).last_access -= 120
+	b = finished(store)
+	assert store.get(a) is None and store.get(b) is not None
+
+def test_total_steps_bound():
+	store = TraceStore(max_steps_per_trace=300, max_total_steps=700)
+	a = finished(store)
+	assert store.get(a).trace.truncated
+	b = finished(store)
+	c = finished(store)
+	assert store.get(a) is None and store.get(b) is not None and store.get(c) is not None
+	assert store.stats()['total_steps'] <= 700
+
+	# A running trace counts as its full max_steps, so it is never overshot
+	store = TraceStore(max_steps_per_trace=100, max_total_steps=250)
+	running = [StoredTrace(name, PUZZLE, RULES, 100) for name in ('x', 'y')]
+	for entry in running:
+		store._traces[entry.id] = entry
+	assert store.start(PUZZLE, RULES) is None
+	running[0].trace.finish()
+	assert store.start(PUZZLE, RULES) is not None
+
+def test_delete_cancels_running_trace():
+	# Deleted while running, a trace keeps its share of the bounds until its solve stops
+	store = TraceStore(max_traces=2, max_steps_per_trace=100, max_total_steps=250)
+	running = [StoredTrace(name, PUZZLE, RULES, 100) for name in ('x', 'y')]
+	for entry in running:
+		store._traces[entry.id] = entry
+	assert store.delete('x') and running[0].cancelled
+	assert store.get('x') is None
+	assert store.start(PUZZLE, RULES) is None
+	assert store.stats()['stopping'] == 1
+	running[0].trace.finish()
+	assert store.start(PUZZLE, RULES) is not None
+
+	# The cancelled solve stops at its next budget check
+	cancelled = []
+	for board in load()['hard']:
+		entry = StoredTrace('y', board, RULES, 10 ** 6)
+		entry.cancelled = True
+		entry.run()
+		assert entry.trace.done
+		cancelled.append(entry.budget_exceeded == 'cancelled')
+	assert any(cancelled)
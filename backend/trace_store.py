@@ -0,0 +1,257 @@
+"""Server-side storage of solver traces for paged and streamed retrieval.
+
+A solve started through the store runs in a background thread and records
+its steps into a LiveTrace, a CompactTrace that wakes up readers as steps
+arrive. Clients fetch ranges of steps or stream them while the solver is
+still running. Each trace is capped at max_steps records, and the store as
+a whole is bounded by trace count and total steps, evicting the least
+recently used finished traces first. A running trace counts as its full
+max_steps, so new traces are refused rather than let the total overshoot.
+Deleting a running trace cancels its solve, and it keeps counting against
+the bounds until the solve has stopped.
+"""
+
+import copy
+import os
+import threading
+import time
+import uuid
+from collections import OrderedDict
+
+import solver
+from solver_trace import CompactTrace
+from stats import BudgetExceeded, SearchStats
+
+MAX_TRACES = int(os.environ.get("SUDOKU_TRACE_MAX", 100))
+MAX_STEPS_PER_TRACE = int(os.environ.get("SUDOKU_TRACE_MAX_STEPS", 1000000))
+MAX_TOTAL_STEPS = int(os.environ.get("SUDOKU_TRACE_MAX_TOTAL_STEPS", 5000000))
+TRACE_TTL = float(os.environ.get("SUDOKU_TRACE_TTL", 600))
+# Background solves are stopped after this many seconds
+TRACE_TIME_LIMIT = float(os.environ.get("SUDOKU_TRACE_TIME_LIMIT", 60))
+
+# Readers are woken up every NOTIFY_EVERY recorded steps
+NOTIFY_EVERY = 1024
+
+
+class LiveTrace(CompactTrace):
+    """CompactTrace that stops recording at max_steps and notifies readers."""
+
+    def __init__(self, max_steps):
+        super().__init__()
+        self.max_steps = max_steps
+        self.truncated = False
+        self.done = False
+        self._skipped_assigns = 0
+        self.changed = threading.Condition()
+
+    def _full(self):
+        if len(self) < self.max_steps:
+            return False
+        self.truncated = True
+        return True
+
+    def _recorded(self):
+        if len(self) % NOTIFY_EVERY == 0:
+            with self.changed:
+                self.changed.notify_all()
+
+    def removal(self, cell, reason, value, rule=None):
+        if not self._full():
+            super().removal(cell, reason, value, rule)
+            self._recorded()
+
+    def inferred(self, cell, value, rule=None):
+        if not self._full():
+            super().inferred(cell, value, rule)
+            self._recorded()
+
+    def assign(self, cell, value):
+        if self._full():
+            self._skipped_assigns += 1
+            return
+        super().assign(cell, value)
+        self._recorded()
+
+    def revert(self, cell, value, state):
+        # Assigns skipped after truncation are the innermost ones
+        if self._skipped_assigns:
+            self._skipped_assigns -= 1
+        elif self._full():
+            self._open_assigns.pop()
+        else:
+            super().revert(cell, value, state)
+            self._recorded()
+
+    def finish(self):
+        with self.changed:
+            self.done = True
+            self.changed.notify_all()
+
+    def wait_for(self, count, timeout):
+        """Block until more than count steps exist or the solve is done."""
+        with self.changed:
+            if len(self) <= count and not self.done:
+                self.changed.wait(timeout)
+
+
+class StoredTrace:
+    def __init__(self, trace_id, board, rules, max_steps):
+        self.id = trace_id
+        self.board = board
+        self.rules = rules
+        self.trace = LiveTrace(max_steps)
+        self.solution = None
+        self.solvable = None
+        self.error = None
+        self.time_taken_ms = None
+        # Set when the trace is deleted; stops the solve at its next budget check
+        self.cancelled = False
+        self.stats = SearchStats(time_limit=TRACE_TIME_LIMIT, cancel=lambda: self.cancelled)
+        self.budget_exceeded = None
+        self.last_access = time.monotonic()
+
+    def run(self):
+        start = time.perf_counter()
+        try:
+            self.solution, trace, self.solvable = solver.solve(copy.deepcopy(self.board), self.rules, self.trace,
+                                                                stats=self.stats)
+        except BudgetExceeded as exc:
+            self.budget_exceeded = exc.reason
+        except Exception as exc:
+            self.error = str(exc)
+        finally:
+            self.time_taken_ms = (time.perf_counter() - start) * 1000
+            self.trace.finish()
+
+    def summary(self):
+        trace = self.trace
+        return {
+            "trace_id": self.id,
+            "done": trace.done,
+            "num_steps": len(trace),
+            "truncated": trace.truncated,
+            "solvable": self.solvable,
+            "solution": self.solution,
+            "error": self.error,
+            "budget_exceeded": self.budget_exceeded,
+            "time_taken_ms": self.time_taken_ms,
+            "stats": self.stats.to_dict(self.time_taken_ms) if trace.done else None,
+        }
+
+
+class TraceStore:
+    def __init__(self, max_traces=MAX_TRACES, max_steps_per_trace=MAX_STEPS_PER_TRACE,
+                 max_total_steps=MAX_TOTAL_STEPS, ttl=TRACE_TTL):
+        self.max_traces = max_traces
+        self.max_steps_per_trace = max_steps_per_trace
+        self.max_total_steps = max_total_steps
+        self.ttl = ttl
+        self._traces = OrderedDict()
+        # Deleted traces whose solve has not stopped yet; they still count against the bounds
+        self._stopping = {}
+        self._lock = threading.Lock()
+        self.evictions = 0
+
+    def start(self, board, rules):
+        """Start solving board in the background and return the new trace id.
+
+        Returns None when, even after evicting every finished trace it may,
+        the store has no room for another trace or for its max_steps_per_trace.
+        """
+        entry = StoredTrace(uuid.uuid4().hex, board, tuple(rules), self.max_steps_per_trace)
+        with self._lock:
+            total = self._evict()
+            if len(self._traces) + len(self._stopping) >= self.max_traces or total + self.max_steps_per_trace > self.max_total_steps:
+                return None
+            self._traces[entry.id] = entry
+        threading.Thread(target=entry.run, name=f"trace-{entry.id}", daemon=True).start()
+        return entry.id
+
+    def get(self, trace_id):
+        with self._lock:
+            entry = self._traces.get(trace_id)
+            if entry is not None:
+                entry.last_access = time.monotonic()
+                self._traces.move_to_end(trace_id)
+            return entry
+
+    def delete(self, trace_id):
+        """Drop a trace, cancelling its solve if it is still running."""
+        with self._lock:
+            entry = self._traces.pop(trace_id, None)
+            if entry is None:
+                return False
+            if not entry.trace.done:
+                entry.cancelled = True
+                self._stopping[trace_id] = entry
+            return True
+
+    def _reserved(self, entry):
+        """Steps entry holds, or may still grow to while its solve runs."""
+        trace = entry.trace
+        return len(trace) if trace.done else trace.max_steps
+
+    def _evict(self):
+        """Drop expired traces, then least recently used finished ones, until a new trace fits.
+
+        Returns the steps reserved by the traces left (see _reserved).
+        """
+        for trace_id, entry in list(self._stopping.items()):
+            if entry.trace.done:
+                del self._stopping[trace_id]
+
+        now = time.monotonic()
+        for trace_id, entry in list(self._traces.items()):
+            if entry.trace.done and now - entry.last_access > self.ttl:
+                del self._traces[trace_id]
+                self.evictions += 1
+
+        total = sum(self._reserved(entry) for entry in (*self._traces.values(), *self._stopping.values()))
+        for trace_id, entry in list(self._traces.items()):
+            if len(self._traces) + len(self._stopping) < self.max_traces and total + self.max_steps_per_trace <= self.max_total_steps:
+                break
+            if not entry.trace.done:
+                continue
+            total -= len(entry.trace)
+            del self._traces[trace_id]
+            self.evictions += 1
+        return total
+
+    def steps(self, trace_id, start, count):
+        """Return (steps, entry) for a range; entry is None for an unknown id."""
+        entry = self.get(trace_id)
+        if entry is None:
+            return None, None
+        return entry.trace.steps(start, start + count), entry
+
+    def stream(self, entry, start=0, batch=500, poll=1.0):
+        """Yield step dicts from start onwards as the solver records them."""
+        trace = entry.trace
+        position = start
+        while True:
+            done = trace.done
+            available = len(trace)
+            while position < available:
+                steps = trace.steps(position, min(available, position + batch))
+                for step in steps:
+                    yield step
+                position += len(steps)
+            if done:
+                return
+            entry.last_access = time.monotonic()
+            trace.wait_for(position, poll)
+
+    def stats(self):
+        with self._lock:
+            return {
+                "traces": len(self._traces),
+                "running": sum(1 for entry in self._traces.values() if not entry.trace.done),
+                "stopping": sum(1 for entry in self._stopping.values() if not entry.trace.done),
+                "total_steps": sum(len(entry.trace) for entry in self._traces.values()),
+                "max_traces": self.max_traces,
+                "max_total_steps": self.max_total_steps,
+                "evictions": self.evictions,
+            }
+
+
+trace_store = TraceStore()